@@ -0,0 +1,94 @@
+"""
+Benchmark: media route (media.serve_file) vs the old StaticFiles mount
+Usage: python benchmarks/bench_media.py [-n REQUESTS]
+
+Starts one uvicorn server with both handlers over the same temp directory
+and measures over real HTTP: full image GETs, revalidation by a client that
+already has the file, and a video seek (Range) near the end of a file.
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.staticfiles import StaticFiles
+
+from media import serve_file
+
+
+def build_app(root: Path) -> FastAPI:
+    app = FastAPI()
+
+    @app.api_route("/media/{path:path}", methods=["GET", "HEAD"])
+    async def media(request: Request, path: str):
+        return await serve_file(request, root, path)
+
+    app.mount("/static", StaticFiles(directory=str(root)), name="static")
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run(client: httpx.Client, url: str, n: int, headers: dict = None) -> tuple[float, int, set]:
+    """Returns (requests per second, body bytes received, statuses)."""
+    received, statuses = 0, set()
+    started = time.perf_counter()
+    for _ in range(n):
+        r = client.get(url, headers=headers)
+        received += len(r.content)
+        statuses.add(r.status_code)
+    return n / (time.perf_counter() - started), received, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=300, help="requests per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "image.jpg").write_bytes(os.urandom(200 * 1024))
+        (root / "video.mp4").write_bytes(os.urandom(20 * 1024 * 1024))
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(build_app(root), port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+        base = f"http://127.0.0.1:{port}"
+        print(f"{'scenario':<28}{'handler':<10}{'req/s':>10}{'MB recv':>10}  status")
+        with httpx.Client(base_url=base) as client:
+            for prefix in ("/static", "/media"):
+                first = client.get(f"{prefix}/image.jpg")
+                validators = {"If-None-Match": first.headers["etag"]}
+                scenarios = [
+                    ("image GET (200 KB)", f"{prefix}/image.jpg", args.n, None),
+                    ("image revalidate", f"{prefix}/image.jpg", args.n, validators),
+                    ("video seek, last 1 MB", f"{prefix}/video.mp4", max(args.n // 10, 5),
+                     {"Range": f"bytes={19 * 1024 * 1024}-"}),
+                ]
+                for name, url, n, headers in scenarios:
+                    rps, received, statuses = run(client, url, n, headers)
+                    print(f"{name:<28}{prefix[1:]:<10}{rps:>10.0f}{received / 2**20:>10.1f}  {sorted(statuses)}")
+                print(f"{'cache-control':<28}{prefix[1:]:<10}  {first.headers.get('cache-control', '-')}")
+                print()
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
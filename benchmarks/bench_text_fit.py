@@ -0,0 +1,160 @@
+"""
+Benchmark: caption fitting (generator.fit_text) vs the old linear search
+Usage: python benchmarks/bench_text_fit.py [-n CAPTIONS] [--seed SEED]
+
+Draws random captions at every position and size setting on templates of
+several shapes twice: with fit_text and with the previous loop (2px steps
+from the base size, textbbox on every candidate line). Every pair of images
+must be pixel-identical; reports font measurement calls and time.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+import generator
+from generator import POSITIONS, TextLayout, find_font
+
+WORDS = (
+    "КОГДА КОД НАКОНЕЦ КОМПИЛИРУЕТСЯ С ПЕРВОГО РАЗА НО ТЕСТЫ ВСЁ РАВНО ПАДАЮТ "
+    "ПОНЕДЕЛЬНИК ДЕДЛАЙН ВЧЕРА ПРОДАКШН ЛЕЖИТ А Я В ОТПУСКЕ МАМА КУПИ КОТИКА "
+    "WHEN YOU FIX ONE BUG AND TEN MORE APPEAR IT WORKS ON MY MACHINE ¯\\_(ツ)_/¯ 42 !!! ... "
+    "ПРЕВЫСОКОМНОГОРАССМОТРИТЕЛЬСТВУЮЩИЙ ААААААААААААААААААААААААААА"
+).split()
+SIZES = [(400, 300), (800, 600), (1080, 1080), (600, 1200), (1920, 1080), (320, 640)]
+FONT_SIZES = ["small", "medium", "large", "auto"]
+
+
+def reference_fit(text, font_path, max_width, max_height, base_size) -> TextLayout:
+    """The fitting loop as it was before fit_text, measuring with textbbox."""
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+    def width(line, font):
+        bbox = draw.textbbox((0, 0), line, font=font)
+        return bbox[2] - bbox[0]
+
+    def wrap(font):
+        lines, current = [], []
+        for word in text.split():
+            if width(word, font) > max_width:
+                # Over-long words are broken at characters (see _wrap_text)
+                if current:
+                    lines.append(" ".join(current))
+                piece = ""
+                for char in word:
+                    if piece and width(piece + char, font) > max_width:
+                        lines.append(piece)
+                        piece = ""
+                    piece += char
+                current = [piece]
+            elif width(" ".join(current + [word]), font) <= max_width:
+                current.append(word)
+            else:
+                if current:
+                    lines.append(" ".join(current))
+                current = [word]
+        if current:
+            lines.append(" ".join(current))
+        return lines or [""]
+
+    font_size = base_size
+    while font_size >= 14:
+        font = generator._load_font(font_path, font_size)
+        total = 0
+        for line in wrap(font):
+            bbox = draw.textbbox((0, 0), line, font=font)
+            total += bbox[3] - bbox[1] + int(font_size * 0.15)
+        if total <= max_height:
+            break
+        font_size -= 2
+    font = generator._load_font(font_path, max(font_size, 14))
+    lines = wrap(font)
+    heights = []
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font)
+        heights.append(bbox[3] - bbox[1])
+    return TextLayout(font, font_size, lines, heights)
+
+
+class Counter:
+    """Counts FreeTypeFont.getbbox/getlength calls (textbbox goes through getbbox)."""
+
+    def __init__(self):
+        self.calls = 0
+        for name in ("getbbox", "getlength"):
+            original = getattr(ImageFont.FreeTypeFont, name)
+            setattr(ImageFont.FreeTypeFont, name, self._wrap(original))
+
+    def _wrap(self, original):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return original(*args, **kwargs)
+        return counted
+
+
+def render(cases, fit, font_path) -> tuple[list[Image.Image], float]:
+    """Images of every case drawn with `fit`, and the seconds spent fitting."""
+    spent = 0.0
+
+    def timed(*args):
+        nonlocal spent
+        started = time.perf_counter()
+        try:
+            return fit(*args)
+        finally:
+            spent += time.perf_counter() - started
+
+    generator.fit_text = timed
+    images = []
+    for (w, h), text, position, font_size in cases:
+        img = Image.new("RGB", (w, h), (90, 120, 160))
+        generator._draw_text_at_position(ImageDraw.Draw(img), text, font_path, w, h, position, font_size)
+        images.append(img)
+    return images, spent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200, help="captions")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        (rng.choice(SIZES), " ".join(rng.choices(WORDS, k=rng.randint(1, 30))),
+         rng.choice(list(POSITIONS)), rng.choice(FONT_SIZES))
+        for _ in range(args.n)
+    ]
+    font_path = find_font()
+    print(f"Font: {font_path}, {len(cases)} captions")
+
+    new_fit = generator.fit_text
+    counter = Counter()
+    render(cases, reference_fit, font_path)  # Warm the font cache for both
+    generator._word_metrics.clear()
+
+    results = {}
+    for name, fit in [("linear", reference_fit), ("binary", new_fit), ("binary (warm)", new_fit)]:
+        counter.calls = 0
+        images, elapsed = render(cases, fit, font_path)
+        results[name] = images
+        print(f"{name:>14}: {counter.calls:>8} measurements  {elapsed * 1000:8.1f} ms fitting")
+    generator.fit_text = new_fit
+
+    differing = [
+        i for i, (a, b) in enumerate(zip(results["linear"], results["binary"]))
+        if ImageChops.difference(a, b).getbbox() is not None
+    ]
+    for i in differing[:5]:
+        print(f"  differs: {cases[i]}")
+    print(f"Identical images: {len(cases) - len(differing)}/{len(cases)}")
+    sys.exit(1 if differing else 0)
+
+
+if __name__ == "__main__":
+    main()
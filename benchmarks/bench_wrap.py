@@ -0,0 +1,100 @@
+"""
+Benchmark: generator._wrap_text vs the original textbbox word wrapper
+Usage: python benchmarks/bench_wrap.py [--size PX] [--width PX] [-r REPEATS]
+
+Wraps long Cyrillic captions of growing length. The original measured the
+whole candidate line with textbbox for every word; _wrap_text measures each
+word once per font and adds widths up. Both must give the same lines,
+except that _wrap_text breaks words too wide for a line of their own.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw
+
+import generator
+from fonts import fonts
+
+WORDS = (
+    "КОГДА ТИМЛИД СКАЗАЛ ЧТО РЕЛИЗ В ПЯТНИЦУ ВЕЧЕРОМ А ТЫ УЖЕ КУПИЛ БИЛЕТЫ НА ДАЧУ "
+    "И ТЕПЕРЬ СИДИШЬ ПЕРЕПИСЫВАЕШЬ МИГРАЦИИ БАЗЫ ДАННЫХ ПОД ЗВУКИ УВЕДОМЛЕНИЙ "
+    "ПРОДАКШН ОПЯТЬ УПАЛ НО ЭТО НЕ БАГ ЭТО ФИЧА ЗАКАЗЧИК ДОВОЛЕН КОТИК СПИТ"
+).split()
+LENGTHS = [10, 50, 200, 1000]
+
+
+def original_wrap(draw: ImageDraw.ImageDraw, text: str, font, max_width: int) -> list[str]:
+    """_wrap_text as it was: textbbox on the growing line for every word."""
+    words = text.split()
+    lines = []
+    current_line = []
+    for word in words:
+        test_line = " ".join(current_line + [word])
+        bbox = draw.textbbox((0, 0), test_line, font=font)
+        if bbox[2] - bbox[0] <= max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(" ".join(current_line))
+            current_line = [word]
+    if current_line:
+        lines.append(" ".join(current_line))
+    return lines or [""]
+
+
+def width(draw: ImageDraw.ImageDraw, line: str, font) -> int:
+    bbox = draw.textbbox((0, 0), line, font=font)
+    return bbox[2] - bbox[0]
+
+
+def best_of(repeats: int, fn) -> float:
+    """Fastest of `repeats` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=48, help="font size")
+    parser.add_argument("--width", type=int, default=486, help="max line width (45%% of 1080px)")
+    parser.add_argument("-r", type=int, default=5, help="repeats (best is reported)")
+    args = parser.parse_args()
+
+    font = fonts.get(args.size)
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    rng = random.Random(1)
+    print(f"Font {fonts.path()} at {args.size}px, lines up to {args.width}px")
+    print(f"{'words':>6} {'lines':>6} {'original':>11} {'cold':>9} {'warm':>9} {'speedup':>8}")
+
+    for n in LENGTHS:
+        text = " ".join(rng.choices(WORDS, k=n))
+        expected = original_wrap(draw, text, font, args.width)
+        lines = generator._wrap_text(text, font, args.width)
+        if all(width(draw, line, font) <= args.width for line in expected):
+            assert lines == expected, "wrapping differs"
+        else:
+            # The original let over-long words overflow; _wrap_text breaks them
+            assert all(width(draw, line, font) <= args.width for line in lines), "line overflows"
+
+        original = best_of(args.r, lambda: original_wrap(draw, text, font, args.width))
+
+        def cold():
+            generator._word_metrics.pop(font, None)
+            generator._wrap_text(text, font, args.width)
+
+        cold_ms = best_of(args.r, cold)
+        warm_ms = best_of(args.r, lambda: generator._wrap_text(text, font, args.width))
+        print(f"{n:>6} {len(expected):>6} {original:>9.2f}ms {cold_ms:>7.2f}ms {warm_ms:>7.2f}ms {original / warm_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
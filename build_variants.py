@@ -0,0 +1,31 @@
+"""
+Render thumbnail/medium variants for memes uploaded before the pipeline
+Usage: python build_variants.py
+"""
+import asyncio
+
+from database_new import init_db, get_memes_without_variants, set_meme_variants, close_db
+from thumbnails import build_variants
+
+
+async def main():
+    await init_db()
+    rendered = skipped = 0
+    after_id = 0
+    while batch := await get_memes_without_variants(after_id, limit=50):
+        results = await asyncio.gather(*(build_variants(meme["filename"]) for meme in batch))
+        for meme, variants in zip(batch, results):
+            if variants:
+                await set_meme_variants(meme["id"], variants)
+                rendered += 1
+            else:
+                skipped += 1
+        after_id = batch[-1]["id"]
+        print(f"  ...до #{after_id}: готово {rendered}, пропущено {skipped}")
+    await close_db()
+    
+    print(f"✅ Варианты построены: {rendered}, пропущено: {skipped}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
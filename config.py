@@ -19,6 +19,32 @@ DB_PATH = DATA_DIR / "bot.db"
 for d in [DATA_DIR, TEMPLATES_DIR, GENERATED_DIR, UPLOADS_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
+# === Database ===
+DB_POOL_READERS = int(os.getenv("DB_POOL_READERS", "4"))  # Read-only connections per pool
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))  # Prepared statements per connection
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))  # Page cache per connection
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+DB_WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "64"))  # Max queued writes per transaction
+COUNTER_FLUSH_MS = int(os.getenv("COUNTER_FLUSH_MS", "500"))  # Write-behind counter flush interval
+COUNTER_FLUSH_EVENTS = int(os.getenv("COUNTER_FLUSH_EVENTS", "1000"))  # ...or after this many increments
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "30"))  # Seconds a filtered meme count is reused
+COUNT_APPROX_LIMIT = int(os.getenv("COUNT_APPROX_LIMIT", "1000"))  # Approximate counts stop here
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "60"))  # Seconds a session lookup is reused
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SWEEP_INTERVAL = int(os.getenv("SWEEP_INTERVAL", "600"))  # Expired sessions/admin codes cleanup, seconds
+SWEEP_BATCH = 500  # Rows deleted per sweeper transaction
+BULK_CHUNK = 500  # Ids per statement in bulk moderation
+
+# === Ranking ===
+HOT_DECAY_HOURS = float(os.getenv("HOT_DECAY_HOURS", "12"))  # Age worth 10x engagement in "hot" sort
+HOT_REFRESH_INTERVAL = int(os.getenv("HOT_REFRESH_INTERVAL", "60"))  # Seconds between score refreshes
+HOT_BATCH = 1000  # Memes rescored per transaction
+RELATED_LIMIT = int(os.getenv("RELATED_LIMIT", "8"))  # Neighbours stored per meme
+RELATED_REFRESH_INTERVAL = int(os.getenv("RELATED_REFRESH_INTERVAL", "300"))  # Seconds between rebuilds
+RELATED_BATCH = 100  # Memes whose neighbours are rebuilt per transaction
+RELATED_MAX_LIKERS = 500  # Latest likers of a meme used for co-likes
+
 # === Bot ===
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 # Don't raise error for web-only deployment
@@ -47,6 +73,14 @@ MAX_UPLOADS_PER_DAY = 3  # Limit uploads per user per day
 MIN_IMAGE_SIZE = (200, 200)  # Minimum image dimensions
 MAX_IMAGE_SIZE = (4096, 4096)  # Maximum image dimensions
 
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))  # Resumable upload chunk hint
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))  # Abandoned uploads are dropped after
+THUMB_WORKERS = int(os.getenv("THUMB_WORKERS", "2"))  # Processes rendering image variants
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "")  # nginx internal location for X-Accel-Redirect
+IMG_CACHE_MAX_MB = int(os.getenv("IMG_CACHE_MAX_MB", "512"))  # Disk budget for on-demand resizes
+IMG_MAX_WIDTH = 2048  # Widest /img/ resize
+IMG_WIDTH_STEP = 32  # Requested widths are rounded up to this
+
 # === Pagination ===
 TEMPLATES_PER_PAGE = 6
 
@@ -63,3 +97,12 @@ FONT_PATHS = [
     "/usr/share/fonts/liberation-fonts/LiberationSans-Bold.ttf",
     "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
 ]
+FONT_CACHE_SIZE = int(os.getenv("FONT_CACHE_SIZE", "128"))  # Loaded (path, size) fonts kept
+
+# === Meme Rendering ===
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))  # Processes running generate_meme
+RENDER_QUEUE = int(os.getenv("RENDER_QUEUE", "8"))  # Jobs allowed to wait for a worker before "busy"
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "30"))  # Seconds per job
+RENDER_MAX_TASKS = int(os.getenv("RENDER_MAX_TASKS", "0"))  # Jobs before a worker is replaced, losing its caches (0 = never)
+TEMPLATE_CACHE_MB = int(os.getenv("TEMPLATE_CACHE_MB", "256"))  # Decoded templates kept per worker
+MEME_MAX_SIDE = int(os.getenv("MEME_MAX_SIDE", "0"))  # Longest side of a generated meme (0 = template size; Telegram sends photos at up to 2560)
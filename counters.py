@@ -0,0 +1,209 @@
+"""
+MemePlatform - Write-Behind Counters
+Hot counters (views, likes, shares, template usage) are added up in memory
+and flushed to the writer actor in one transaction every few hundred ms.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from pathlib import Path
+
+from db_pool import get_writer
+from config import COUNTER_FLUSH_MS, COUNTER_FLUSH_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# (table, column, row id)
+Key = tuple[str, str, int]
+
+
+class CounterBuffer:
+    """
+    Pending increments for one database file.
+
+    add() is cheap and thread-safe; a background thread flushes everything
+    every flush_ms, or sooner once max_pending increments piled up. Deltas
+    stay visible to pending()/merge() until their transaction commits, so
+    reads keep looking live.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: dict[str, tuple[str, ...]],
+        flush_ms: int = COUNTER_FLUSH_MS,
+        max_pending: int = COUNTER_FLUSH_EVENTS
+    ):
+        self.path = Path(path)
+        self.columns = columns  # Whitelist: table -> counter columns
+        self.interval = max(flush_ms, 1) / 1000
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[Key, int] = defaultdict(int)
+        self._inflight: dict[Key, int] = {}
+        self._events = 0
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    # === Increments ===
+
+    def add(self, table: str, column: str, row_id: int, delta: int = 1):
+        """Queue counter += delta for one row."""
+        if column not in self.columns.get(table, ()):
+            raise ValueError(f"{table}.{column} is not a buffered counter")
+        if self._stopped:
+            raise RuntimeError(f"Counters for {self.path.name} are stopped")
+        with self._lock:
+            self._pending[(table, column, row_id)] += delta
+            self._events += 1
+            full = self._events >= self.max_pending
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    # === Reads ===
+
+    def pending(self, table: str, column: str, row_id: int) -> int:
+        """Not yet committed delta for one row."""
+        key = (table, column, row_id)
+        with self._lock:
+            return self._pending.get(key, 0) + self._inflight.get(key, 0)
+
+    def total(self, table: str, column: str) -> int:
+        """Not yet committed delta summed over a whole column."""
+        with self._lock:
+            return sum(
+                delta for source in (self._pending, self._inflight)
+                for (t, c, _), delta in source.items() if t == table and c == column
+            )
+
+    def merge(self, table: str, rows: list[dict]) -> list[dict]:
+        """Add pending deltas to counter columns of fetched rows (in place)."""
+        if not rows or not (self._pending or self._inflight):
+            return rows
+        with self._lock:
+            for row in rows:
+                for column in self.columns[table]:
+                    if column not in row:
+                        continue
+                    key = (table, column, row["id"])
+                    delta = self._pending.get(key, 0) + self._inflight.get(key, 0)
+                    if delta:
+                        row[column] = (row[column] or 0) + delta
+        return rows
+
+    # === Flushing ===
+
+    def flush(self) -> Future | None:
+        """Hand everything pending to the writer; returns its future."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return None
+                batch, self._pending = dict(self._pending), defaultdict(int)
+                self._events = 0
+                for key, delta in batch.items():
+                    self._inflight[key] = self._inflight.get(key, 0) + delta
+
+            updates = defaultdict(list)
+            for (table, column, row_id), delta in batch.items():
+                if delta:
+                    updates[(table, column)].append((delta, row_id))
+
+            def _job(db):
+                for (table, column), params in updates.items():
+                    db.executemany(
+                        f"UPDATE {table} SET {column} = {column} + ? WHERE id = ?", params
+                    )
+
+            future = get_writer(self.path).submit(_job)
+            future.add_done_callback(lambda f: self._settle(batch, f))
+            return future
+
+    async def flush_async(self):
+        """Flush and wait for the commit."""
+        future = self.flush()
+        if future is not None:
+            await asyncio.wrap_future(future)
+
+    def _settle(self, batch: dict[Key, int], future: Future):
+        """Drop committed deltas from the in-flight view (or requeue on failure)."""
+        failed = future.exception() is not None
+        with self._lock:
+            for key, delta in batch.items():
+                left = self._inflight.get(key, 0) - delta
+                if left:
+                    self._inflight[key] = left
+                else:
+                    self._inflight.pop(key, None)
+                if failed and not self._stopped:
+                    self._pending[key] += delta
+        if failed:
+            logger.error(f"Counter flush on {self.path.name} failed: {future.exception()}")
+
+    def _start(self):
+        with self._flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"counters-{self.path.name}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Counter flush on {self.path.name} failed: {e}")
+
+    def stop(self, timeout: float = 10):
+        """Flush what is left and wait for it to commit."""
+        self._stopped = True
+        self._wake.set()
+        future = self.flush()
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception as e:
+                logger.error(f"Final counter flush on {self.path.name} failed: {e}")
+
+
+_buffers: dict[str, CounterBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_counters(path: Path, columns: dict[str, tuple[str, ...]]) -> CounterBuffer:
+    """Process-wide counter buffer for a database file."""
+    key = str(Path(path).resolve())
+    buffer = _buffers.get(key)
+    if buffer is None:
+        with _buffers_lock:
+            buffer = _buffers.get(key)
+            if buffer is None:
+                buffer = _buffers[key] = CounterBuffer(path, columns)
+    return buffer
+
+
+async def flush_counters():
+    """Flush every buffer and wait until the writes are committed."""
+    for buffer in list(_buffers.values()):
+        await buffer.flush_async()
+
+
+# Registered after db_writer's hook, so it runs first at exit (atexit is LIFO)
+@atexit.register
+def stop_counters():
+    """Flush and stop every buffer."""
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+        _buffers.clear()
+    for buffer in buffers:
+        buffer.stop()
@@ -1,134 +1,163 @@
 """
 MemeMakerBot - Database (SQLite + aiosqlite)
 """
-import aiosqlite
 from datetime import datetime
+
+import counters
+import db_pool
+import migrations
 from config import DB_PATH
 
 
+def _read():
+    """Borrow a pooled read-only connection."""
+    return db_pool.read(DB_PATH)
+
+
+def _writer():
+    """Writer actor that serializes all writes to this database."""
+    return db_pool.get_writer(DB_PATH)
+
+
+def _counters():
+    """Write-behind buffer for template usage counts."""
+    return counters.get_counters(DB_PATH, {"templates": ("usage_count",)})
+
+
+BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        language TEXT DEFAULT 'ru',
+        created_at TEXT,
+        last_active TEXT,
+        is_banned INTEGER DEFAULT 0,
+        uploads_today INTEGER DEFAULT 0,
+        last_upload_date TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        filename TEXT NOT NULL UNIQUE,
+        is_active INTEGER DEFAULT 1,
+        usage_count INTEGER DEFAULT 0,
+        created_at TEXT,
+        uploaded_by INTEGER DEFAULT 0,
+        is_user_upload INTEGER DEFAULT 0,
+        moderation_status TEXT DEFAULT 'approved'
+    );
+    
+    CREATE TABLE IF NOT EXISTS memes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        template_id INTEGER,
+        top_text TEXT,
+        bottom_text TEXT,
+        created_at TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT,
+        user_id INTEGER,
+        details TEXT,
+        created_at TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+"""
+
+
+def _baseline_schema(db):
+    """Create tables and add columns missing from databases made by older versions."""
+    migrations.run_script(db, BASELINE_SCHEMA)
+    
+    # Check users table
+    columns = {row[1] for row in db.execute("PRAGMA table_info(users)").fetchall()}
+    
+    if "uploads_today" not in columns:
+        db.execute("ALTER TABLE users ADD COLUMN uploads_today INTEGER DEFAULT 0")
+    if "last_upload_date" not in columns:
+        db.execute("ALTER TABLE users ADD COLUMN last_upload_date TEXT")
+    
+    # Check templates table
+    columns = {row[1] for row in db.execute("PRAGMA table_info(templates)").fetchall()}
+    
+    if "uploaded_by" not in columns:
+        db.execute("ALTER TABLE templates ADD COLUMN uploaded_by INTEGER DEFAULT 0")
+    if "is_user_upload" not in columns:
+        db.execute("ALTER TABLE templates ADD COLUMN is_user_upload INTEGER DEFAULT 0")
+    if "moderation_status" not in columns:
+        db.execute("ALTER TABLE templates ADD COLUMN moderation_status TEXT DEFAULT 'approved'")
+
+
+BOT_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_templates_active_usage ON templates(is_active, usage_count);
+    CREATE INDEX IF NOT EXISTS idx_templates_moderation ON templates(moderation_status);
+    CREATE INDEX IF NOT EXISTS idx_stats_event_type ON stats(event_type);
+"""
+
+# Append-only: version N is MIGRATIONS[N - 1]
+MIGRATIONS = [
+    ("baseline schema", _baseline_schema),
+    ("bot indexes", BOT_INDEXES),
+]
+
+
 async def init_db():
-    """Initialize database tables."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.executescript("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                language TEXT DEFAULT 'ru',
-                created_at TEXT,
-                last_active TEXT,
-                is_banned INTEGER DEFAULT 0,
-                uploads_today INTEGER DEFAULT 0,
-                last_upload_date TEXT
-            );
-            
-            CREATE TABLE IF NOT EXISTS templates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                filename TEXT NOT NULL UNIQUE,
-                is_active INTEGER DEFAULT 1,
-                usage_count INTEGER DEFAULT 0,
-                created_at TEXT,
-                uploaded_by INTEGER DEFAULT 0,
-                is_user_upload INTEGER DEFAULT 0,
-                moderation_status TEXT DEFAULT 'approved'
-            );
-            
-            CREATE TABLE IF NOT EXISTS memes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                template_id INTEGER,
-                top_text TEXT,
-                bottom_text TEXT,
-                created_at TEXT
-            );
-            
-            CREATE TABLE IF NOT EXISTS stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT,
-                user_id INTEGER,
-                details TEXT,
-                created_at TEXT
-            );
-            
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            );
-        """)
-        await db.commit()
-        
-        # Migration: Add new columns if they don't exist
-        # Check users table
-        cursor = await db.execute("PRAGMA table_info(users)")
-        columns = {row[1] for row in await cursor.fetchall()}
-        
-        if "uploads_today" not in columns:
-            await db.execute("ALTER TABLE users ADD COLUMN uploads_today INTEGER DEFAULT 0")
-        if "last_upload_date" not in columns:
-            await db.execute("ALTER TABLE users ADD COLUMN last_upload_date TEXT")
-        
-        # Check templates table
-        cursor = await db.execute("PRAGMA table_info(templates)")
-        columns = {row[1] for row in await cursor.fetchall()}
-        
-        if "uploaded_by" not in columns:
-            await db.execute("ALTER TABLE templates ADD COLUMN uploaded_by INTEGER DEFAULT 0")
-        if "is_user_upload" not in columns:
-            await db.execute("ALTER TABLE templates ADD COLUMN is_user_upload INTEGER DEFAULT 0")
-        if "moderation_status" not in columns:
-            await db.execute("ALTER TABLE templates ADD COLUMN moderation_status TEXT DEFAULT 'approved'")
-        
-        await db.commit()
+    """Apply pending migrations and open the connection pool."""
+    await _writer().transaction(lambda db: migrations.migrate(db, MIGRATIONS))
+    await db_pool.get_pool(DB_PATH)
 
 
 # === Users ===
 async def get_or_create_user(user_id: int, username: str = None, first_name: str = None, language: str = "ru") -> dict:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        row = await cursor.fetchone()
+    def _tx(db):
+        row = db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
         
         now = datetime.now().isoformat()
         
         if row:
-            await db.execute(
+            db.execute(
                 "UPDATE users SET last_active = ?, username = ?, first_name = ? WHERE user_id = ?",
                 (now, username, first_name, user_id)
             )
-            await db.commit()
             return dict(row)
         else:
-            await db.execute(
+            db.execute(
                 "INSERT INTO users (user_id, username, first_name, language, created_at, last_active) VALUES (?, ?, ?, ?, ?, ?)",
                 (user_id, username, first_name, language, now, now)
             )
-            await db.commit()
             return {"user_id": user_id, "username": username, "first_name": first_name, "language": language}
+    
+    return await _writer().transaction(_tx)
 
 
 async def get_user_language(user_id: int) -> str:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT language FROM users WHERE user_id = ?", (user_id,))
         row = await cursor.fetchone()
         return row[0] if row else "ru"
 
 
 async def set_user_language(user_id: int, language: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE users SET language = ? WHERE user_id = ?", (language, user_id))
-        await db.commit()
+    await _writer().execute("UPDATE users SET language = ? WHERE user_id = ?", (language, user_id))
 
 
 async def get_all_user_ids() -> list[int]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT user_id FROM users WHERE is_banned = 0")
         rows = await cursor.fetchall()
         return [row[0] for row in rows]
 
 
 async def get_users_count() -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM users")
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -136,51 +165,41 @@ async def get_users_count() -> int:
 
 # === Templates ===
 async def get_active_templates() -> list[dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM templates WHERE is_active = 1 ORDER BY usage_count DESC")
         rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    return _counters().merge("templates", [dict(row) for row in rows])
 
 
 async def get_template_by_id(template_id: int) -> dict | None:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM templates WHERE id = ?", (template_id,))
         row = await cursor.fetchone()
-        return dict(row) if row else None
+    return _counters().merge("templates", [dict(row)])[0] if row else None
 
 
 async def add_template(name: str, filename: str) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "INSERT INTO templates (name, filename, created_at) VALUES (?, ?, ?)",
-            (name, filename, datetime.now().isoformat())
-        )
-        await db.commit()
-        return cursor.lastrowid
+    result = await _writer().execute(
+        "INSERT INTO templates (name, filename, created_at) VALUES (?, ?, ?)",
+        (name, filename, datetime.now().isoformat())
+    )
+    return result.lastrowid
 
 
 async def delete_template(template_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("DELETE FROM templates WHERE id = ?", (template_id,))
-        await db.commit()
+    await _writer().execute("DELETE FROM templates WHERE id = ?", (template_id,))
 
 
 async def toggle_template(template_id: int, is_active: bool):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE templates SET is_active = ? WHERE id = ?", (1 if is_active else 0, template_id))
-        await db.commit()
+    await _writer().execute("UPDATE templates SET is_active = ? WHERE id = ?", (1 if is_active else 0, template_id))
 
 
 async def increment_template_usage(template_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE templates SET usage_count = usage_count + 1 WHERE id = ?", (template_id,))
-        await db.commit()
+    _counters().add("templates", "usage_count", template_id)
 
 
 async def get_templates_count() -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM templates")
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -188,25 +207,22 @@ async def get_templates_count() -> int:
 
 async def get_all_templates() -> list[dict]:
     """Get all templates including inactive."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM templates ORDER BY id DESC")
         rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    return _counters().merge("templates", [dict(row) for row in rows])
 
 
 # === Memes ===
 async def save_meme(user_id: int, template_id: int, top_text: str = None, bottom_text: str = None):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO memes (user_id, template_id, top_text, bottom_text, created_at) VALUES (?, ?, ?, ?, ?)",
-            (user_id, template_id, top_text, bottom_text, datetime.now().isoformat())
-        )
-        await db.commit()
+    await _writer().execute(
+        "INSERT INTO memes (user_id, template_id, top_text, bottom_text, created_at) VALUES (?, ?, ?, ?, ?)",
+        (user_id, template_id, top_text, bottom_text, datetime.now().isoformat())
+    )
 
 
 async def get_memes_count() -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM memes")
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -214,16 +230,14 @@ async def get_memes_count() -> int:
 
 # === Stats ===
 async def log_event(event_type: str, user_id: int = None, details: str = None):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO stats (event_type, user_id, details, created_at) VALUES (?, ?, ?, ?)",
-            (event_type, user_id, details, datetime.now().isoformat())
-        )
-        await db.commit()
+    await _writer().execute(
+        "INSERT INTO stats (event_type, user_id, details, created_at) VALUES (?, ?, ?, ?)",
+        (event_type, user_id, details, datetime.now().isoformat())
+    )
 
 
 async def get_errors_count() -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM stats WHERE event_type = 'error'")
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -231,39 +245,34 @@ async def get_errors_count() -> int:
 
 # === Settings ===
 async def get_setting(key: str, default: str = None) -> str | None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute("SELECT value FROM settings WHERE key = ?", (key,))
         row = await cursor.fetchone()
         return row[0] if row else default
 
 
 async def set_setting(key: str, value: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-            (key, value)
-        )
-        await db.commit()
+    await _writer().execute(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+        (key, value)
+    )
 
 
 # === User Uploads ===
 async def add_user_template(name: str, filename: str, user_id: int) -> int:
     """Add user-uploaded template (pending moderation)."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """INSERT INTO templates 
-               (name, filename, created_at, uploaded_by, is_user_upload, moderation_status, is_active) 
-               VALUES (?, ?, ?, ?, 1, 'pending', 0)""",
-            (name, filename, datetime.now().isoformat(), user_id)
-        )
-        await db.commit()
-        return cursor.lastrowid
+    result = await _writer().execute(
+        """INSERT INTO templates 
+           (name, filename, created_at, uploaded_by, is_user_upload, moderation_status, is_active) 
+           VALUES (?, ?, ?, ?, 1, 'pending', 0)""",
+        (name, filename, datetime.now().isoformat(), user_id)
+    )
+    return result.lastrowid
 
 
 async def get_pending_templates() -> list[dict]:
     """Get templates pending moderation."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT * FROM templates WHERE moderation_status = 'pending' ORDER BY id DESC"
         )
@@ -273,74 +282,66 @@ async def get_pending_templates() -> list[dict]:
 
 async def approve_template(template_id: int):
     """Approve user-uploaded template."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "UPDATE templates SET moderation_status = 'approved', is_active = 1 WHERE id = ?",
-            (template_id,)
-        )
-        await db.commit()
+    await _writer().execute(
+        "UPDATE templates SET moderation_status = 'approved', is_active = 1 WHERE id = ?",
+        (template_id,)
+    )
 
 
 async def reject_template(template_id: int):
     """Reject and delete user-uploaded template."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Get filename to delete file
-        cursor = await db.execute("SELECT filename FROM templates WHERE id = ?", (template_id,))
-        row = await cursor.fetchone()
-        if row:
-            from config import TEMPLATES_DIR
-            file_path = TEMPLATES_DIR / row[0]
-            if file_path.exists():
-                file_path.unlink()
-        
-        await db.execute("DELETE FROM templates WHERE id = ?", (template_id,))
-        await db.commit()
+    result = await _writer().execute(
+        "DELETE FROM templates WHERE id = ? RETURNING filename", (template_id,)
+    )
+    # Delete file once the row is gone
+    if result.rows:
+        from config import TEMPLATES_DIR
+        file_path = TEMPLATES_DIR / result.rows[0][0]
+        if file_path.exists():
+            file_path.unlink()
 
 
 async def get_user_uploads_today(user_id: int) -> int:
     """Get user's upload count for today."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        today = datetime.now().strftime("%Y-%m-%d")
+    today = datetime.now().strftime("%Y-%m-%d")
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT uploads_today, last_upload_date FROM users WHERE user_id = ?",
             (user_id,)
         )
         row = await cursor.fetchone()
-        
-        if not row:
-            return 0
-        
-        uploads_today, last_upload_date = row
-        
-        # Reset counter if it's a new day
-        if last_upload_date != today:
-            await db.execute(
-                "UPDATE users SET uploads_today = 0, last_upload_date = ? WHERE user_id = ?",
-                (today, user_id)
-            )
-            await db.commit()
-            return 0
-        
-        return uploads_today or 0
+    
+    if not row:
+        return 0
+    
+    uploads_today, last_upload_date = row
+    
+    # Reset counter if it's a new day
+    if last_upload_date != today:
+        await _writer().execute(
+            "UPDATE users SET uploads_today = 0, last_upload_date = ? WHERE user_id = ?",
+            (today, user_id)
+        )
+        return 0
+    
+    return uploads_today or 0
 
 
 async def increment_user_uploads(user_id: int):
     """Increment user's upload counter."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        today = datetime.now().strftime("%Y-%m-%d")
-        await db.execute(
-            """UPDATE users SET 
-               uploads_today = COALESCE(uploads_today, 0) + 1,
-               last_upload_date = ?
-               WHERE user_id = ?""",
-            (today, user_id)
-        )
-        await db.commit()
+    today = datetime.now().strftime("%Y-%m-%d")
+    await _writer().execute(
+        """UPDATE users SET 
+           uploads_today = COALESCE(uploads_today, 0) + 1,
+           last_upload_date = ?
+           WHERE user_id = ?""",
+        (today, user_id)
+    )
 
 
 async def get_pending_count() -> int:
     """Get count of pending templates."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT COUNT(*) FROM templates WHERE moderation_status = 'pending'"
         )
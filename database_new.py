@@ -2,194 +2,668 @@
 MemePlatform - Enhanced Database
 Full system with categories, likes, moderation queue
 """
-import aiosqlite
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional
+import base64
 import hashlib
+import json
+import logging
+import math
+import re
 import secrets
+import threading
+import time
 
-from config import DATA_DIR
+import counters
+import db_pool
+import migrations
+from config import (
+    DATA_DIR, COUNT_CACHE_TTL, COUNT_APPROX_LIMIT,
+    SESSION_CACHE_TTL, SESSION_CACHE_SIZE, SWEEP_BATCH, BULK_CHUNK,
+    HOT_DECAY_HOURS, HOT_BATCH,
+    RELATED_LIMIT, RELATED_BATCH, RELATED_MAX_LIKERS
+)
+
+logger = logging.getLogger(__name__)
 
 # Use same database as bot
 DATABASE_PATH = DATA_DIR / "memeplatform.db"
 
 
+def _read():
+    """Borrow a pooled read-only connection."""
+    return db_pool.read(DATABASE_PATH)
+
+
+def _writer():
+    """Writer actor that serializes all writes to this database."""
+    return db_pool.get_writer(DATABASE_PATH)
+
+
+# Hot counters that go through the write-behind buffer
+COUNTER_COLUMNS = {"memes": ("views_count", "likes_count", "shares_count")}
+
+
+def _counters():
+    """Write-behind buffer for view/like/share counters."""
+    return counters.get_counters(DATABASE_PATH, COUNTER_COLUMNS)
+
+
+# ═══════════════════════════════════════════════
+# SCHEMA
+# ═══════════════════════════════════════════════
+
+def _baseline_schema(db):
+    """Tables as they existed before versioned migrations."""
+    # Users table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            telegram_id INTEGER UNIQUE,
+            username TEXT,
+            email TEXT UNIQUE,
+            password_hash TEXT,
+            display_name TEXT,
+            is_admin INTEGER DEFAULT 0,
+            is_banned INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            uploads_today INTEGER DEFAULT 0,
+            uploads_date TEXT
+        )
+    """)
+    
+    # Categories table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            name_en TEXT,
+            description TEXT,
+            icon TEXT DEFAULT '📁',
+            is_active INTEGER DEFAULT 1,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Memes table (enhanced)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS memes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            author_id INTEGER,
+            title TEXT,
+            description TEXT,
+            filename TEXT NOT NULL,
+            file_type TEXT DEFAULT 'image',
+            file_size INTEGER DEFAULT 0,
+            category_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            likes_count INTEGER DEFAULT 0,
+            views_count INTEGER DEFAULT 0,
+            shares_count INTEGER DEFAULT 0,
+            is_featured INTEGER DEFAULT 0,
+            moderated_by INTEGER,
+            moderated_at TIMESTAMP,
+            rejection_reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (author_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id),
+            FOREIGN KEY (moderated_by) REFERENCES users(id)
+        )
+    """)
+    
+    # Likes table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS likes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            meme_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (meme_id) REFERENCES memes(id),
+            UNIQUE(user_id, meme_id)
+        )
+    """)
+    
+    # Comments table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            meme_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            is_hidden INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (meme_id) REFERENCES memes(id)
+        )
+    """)
+    
+    # Direct shares table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS shares (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            meme_id INTEGER NOT NULL,
+            sender_id INTEGER NOT NULL,
+            recipient_telegram_id INTEGER,
+            recipient_email TEXT,
+            share_token TEXT UNIQUE,
+            is_viewed INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (meme_id) REFERENCES memes(id),
+            FOREIGN KEY (sender_id) REFERENCES users(id)
+        )
+    """)
+    
+    # Sessions table for web auth
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            token TEXT UNIQUE NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    
+    # Activity log
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            details TEXT,
+            ip_address TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    
+    # Reports table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            meme_id INTEGER NOT NULL,
+            reporter_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            resolved_by INTEGER,
+            resolved_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (meme_id) REFERENCES memes(id),
+            FOREIGN KEY (reporter_id) REFERENCES users(id),
+            FOREIGN KEY (resolved_by) REFERENCES users(id)
+        )
+    """)
+    
+    # Admin login codes table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS admin_codes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER NOT NULL,
+            code TEXT NOT NULL UNIQUE,
+            expires_at TIMESTAMP NOT NULL,
+            used INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Default categories
+    db.execute("""
+        INSERT OR IGNORE INTO categories (name, name_en, icon, sort_order) VALUES
+        ('Животные', 'Animals', '🐱', 1),
+        ('Политика', 'Politics', '🏛️', 2),
+        ('Приколы', 'Funny', '😂', 3),
+        ('Игры', 'Games', '🎮', 4),
+        ('Кино и ТВ', 'Movies & TV', '🎬', 5),
+        ('IT и программирование', 'IT & Programming', '💻', 6),
+        ('Жизненное', 'Life', '🌍', 7),
+        ('Другое', 'Other', '📦', 8)
+    """)
+
+
+GALLERY_INDEXES = """
+    -- get_memes filter/sort combinations
+    CREATE INDEX IF NOT EXISTS idx_memes_status_created ON memes(status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_memes_status_likes ON memes(status, likes_count);
+    CREATE INDEX IF NOT EXISTS idx_memes_status_views ON memes(status, views_count);
+    CREATE INDEX IF NOT EXISTS idx_memes_category_status_created ON memes(category_id, status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_memes_author_status ON memes(author_id, status);
+    CREATE INDEX IF NOT EXISTS idx_memes_created ON memes(created_at);
+    -- Per-meme child rows (meme page, delete_meme)
+    CREATE INDEX IF NOT EXISTS idx_likes_meme ON likes(meme_id);
+    CREATE INDEX IF NOT EXISTS idx_comments_meme ON comments(meme_id);
+    CREATE INDEX IF NOT EXISTS idx_shares_meme ON shares(meme_id);
+    -- Auth and moderation lookups
+    CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+    CREATE INDEX IF NOT EXISTS idx_admin_codes_telegram ON admin_codes(telegram_id);
+    CREATE INDEX IF NOT EXISTS idx_reports_status ON reports(status);
+"""
+
+
+def _fts_text(column: str) -> str:
+    """SQL expression normalizing a column for the search index (ё -> е)."""
+    return f"replace(replace(coalesce({column}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+# Contentless FTS5 index over title/description; unicode61 folds case
+# (Cyrillic included), prefix indexes keep short prefix queries cheap
+MEMES_FTS = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS memes_fts USING fts5(
+        title, description,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    );
+    
+    INSERT INTO memes_fts(rowid, title, description)
+    SELECT id, {_fts_text('title')}, {_fts_text('description')} FROM memes;
+    
+    CREATE TRIGGER IF NOT EXISTS memes_fts_insert AFTER INSERT ON memes BEGIN
+        INSERT INTO memes_fts(rowid, title, description)
+        VALUES (new.id, {_fts_text('new.title')}, {_fts_text('new.description')});
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS memes_fts_delete AFTER DELETE ON memes BEGIN
+        INSERT INTO memes_fts(memes_fts, rowid, title, description)
+        VALUES ('delete', old.id, {_fts_text('old.title')}, {_fts_text('old.description')});
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS memes_fts_update AFTER UPDATE OF title, description ON memes BEGIN
+        INSERT INTO memes_fts(memes_fts, rowid, title, description)
+        VALUES ('delete', old.id, {_fts_text('old.title')}, {_fts_text('old.description')});
+        INSERT INTO memes_fts(rowid, title, description)
+        VALUES (new.id, {_fts_text('new.title')}, {_fts_text('new.description')});
+    END;
+"""
+
+# Append-only: version N is MIGRATIONS[N - 1]
+# Totals for get_stats, kept current by triggers on every write path
+PLATFORM_STATS = """
+    CREATE TABLE IF NOT EXISTS platform_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_users INTEGER NOT NULL DEFAULT 0,
+        total_memes INTEGER NOT NULL DEFAULT 0,
+        approved_memes INTEGER NOT NULL DEFAULT 0,
+        pending_memes INTEGER NOT NULL DEFAULT 0,
+        rejected_memes INTEGER NOT NULL DEFAULT 0,
+        total_likes INTEGER NOT NULL DEFAULT 0,
+        total_views INTEGER NOT NULL DEFAULT 0,
+        total_shares INTEGER NOT NULL DEFAULT 0,
+        open_reports INTEGER NOT NULL DEFAULT 0
+    );
+    
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        day TEXT PRIMARY KEY,
+        uploads INTEGER NOT NULL DEFAULT 0,
+        signups INTEGER NOT NULL DEFAULT 0
+    );
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_meme_insert AFTER INSERT ON memes BEGIN
+        UPDATE platform_stats SET
+            total_memes = total_memes + 1,
+            approved_memes = approved_memes + (NEW.status IS 'approved'),
+            pending_memes = pending_memes + (NEW.status IS 'pending'),
+            rejected_memes = rejected_memes + (NEW.status IS 'rejected'),
+            total_likes = total_likes + coalesce(NEW.likes_count, 0),
+            total_views = total_views + coalesce(NEW.views_count, 0),
+            total_shares = total_shares + coalesce(NEW.shares_count, 0)
+        WHERE id = 1;
+        INSERT INTO daily_stats (day, uploads) VALUES (DATE(NEW.created_at), 1)
+            ON CONFLICT (day) DO UPDATE SET uploads = uploads + 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_meme_delete AFTER DELETE ON memes BEGIN
+        UPDATE platform_stats SET
+            total_memes = total_memes - 1,
+            approved_memes = approved_memes - (OLD.status IS 'approved'),
+            pending_memes = pending_memes - (OLD.status IS 'pending'),
+            rejected_memes = rejected_memes - (OLD.status IS 'rejected'),
+            total_likes = total_likes - coalesce(OLD.likes_count, 0),
+            total_views = total_views - coalesce(OLD.views_count, 0),
+            total_shares = total_shares - coalesce(OLD.shares_count, 0)
+        WHERE id = 1;
+        UPDATE daily_stats SET uploads = uploads - 1 WHERE day = DATE(OLD.created_at);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_meme_update
+    AFTER UPDATE OF status, likes_count, views_count, shares_count ON memes BEGIN
+        UPDATE platform_stats SET
+            approved_memes = approved_memes + (NEW.status IS 'approved') - (OLD.status IS 'approved'),
+            pending_memes = pending_memes + (NEW.status IS 'pending') - (OLD.status IS 'pending'),
+            rejected_memes = rejected_memes + (NEW.status IS 'rejected') - (OLD.status IS 'rejected'),
+            total_likes = total_likes + coalesce(NEW.likes_count, 0) - coalesce(OLD.likes_count, 0),
+            total_views = total_views + coalesce(NEW.views_count, 0) - coalesce(OLD.views_count, 0),
+            total_shares = total_shares + coalesce(NEW.shares_count, 0) - coalesce(OLD.shares_count, 0)
+        WHERE id = 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_user_insert AFTER INSERT ON users BEGIN
+        UPDATE platform_stats SET total_users = total_users + 1 WHERE id = 1;
+        INSERT INTO daily_stats (day, signups) VALUES (DATE(NEW.created_at), 1)
+            ON CONFLICT (day) DO UPDATE SET signups = signups + 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_user_delete AFTER DELETE ON users BEGIN
+        UPDATE platform_stats SET total_users = total_users - 1 WHERE id = 1;
+        UPDATE daily_stats SET signups = signups - 1 WHERE day = DATE(OLD.created_at);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_report_insert AFTER INSERT ON reports BEGIN
+        UPDATE platform_stats SET open_reports = open_reports + (NEW.status IS 'open') WHERE id = 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_report_delete AFTER DELETE ON reports BEGIN
+        UPDATE platform_stats SET open_reports = open_reports - (OLD.status IS 'open') WHERE id = 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS platform_stats_report_update AFTER UPDATE OF status ON reports BEGIN
+        UPDATE platform_stats
+        SET open_reports = open_reports + (NEW.status IS 'open') - (OLD.status IS 'open')
+        WHERE id = 1;
+    END;
+"""
+
+
+def _rebuild_platform_stats(db):
+    """Recompute platform_stats and daily_stats from the base tables."""
+    db.execute("DELETE FROM platform_stats")
+    db.execute("""
+        INSERT INTO platform_stats (
+            id, total_users, total_memes, approved_memes, pending_memes, rejected_memes,
+            total_likes, total_views, total_shares, open_reports
+        )
+        SELECT 1,
+               (SELECT COUNT(*) FROM users),
+               COUNT(*),
+               COUNT(*) FILTER (WHERE status = 'approved'),
+               COUNT(*) FILTER (WHERE status = 'pending'),
+               COUNT(*) FILTER (WHERE status = 'rejected'),
+               coalesce(SUM(likes_count), 0),
+               coalesce(SUM(views_count), 0),
+               coalesce(SUM(shares_count), 0),
+               (SELECT COUNT(*) FROM reports WHERE status = 'open')
+        FROM memes
+    """)
+    db.execute("DELETE FROM daily_stats")
+    db.execute("""
+        INSERT INTO daily_stats (day, uploads, signups)
+        SELECT day, SUM(uploads), SUM(signups) FROM (
+            SELECT DATE(created_at) AS day, 1 AS uploads, 0 AS signups FROM memes
+            UNION ALL
+            SELECT DATE(created_at), 0, 1 FROM users
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day
+    """)
+
+
+def _platform_stats(db):
+    migrations.run_script(db, PLATFORM_STATS)
+    _rebuild_platform_stats(db)
+
+
+# Per-category and per-author counters, same approach as PLATFORM_STATS
+GROUP_STATS = """
+    CREATE TABLE IF NOT EXISTS category_stats (
+        category_id INTEGER PRIMARY KEY,
+        approved_count INTEGER NOT NULL DEFAULT 0,
+        total_likes INTEGER NOT NULL DEFAULT 0  -- Of approved memes
+    );
+    
+    CREATE TABLE IF NOT EXISTS author_stats (
+        author_id INTEGER PRIMARY KEY,
+        approved_count INTEGER NOT NULL DEFAULT 0,
+        pending_count INTEGER NOT NULL DEFAULT 0,
+        rejected_count INTEGER NOT NULL DEFAULT 0,
+        total_likes INTEGER NOT NULL DEFAULT 0,
+        total_views INTEGER NOT NULL DEFAULT 0
+    );
+    
+    CREATE TRIGGER IF NOT EXISTS category_stats_meme_insert AFTER INSERT ON memes
+    WHEN NEW.category_id IS NOT NULL AND NEW.status IS 'approved' BEGIN
+        INSERT INTO category_stats (category_id, approved_count, total_likes)
+        VALUES (NEW.category_id, 1, coalesce(NEW.likes_count, 0))
+        ON CONFLICT (category_id) DO UPDATE SET
+            approved_count = approved_count + 1,
+            total_likes = total_likes + excluded.total_likes;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS category_stats_meme_delete AFTER DELETE ON memes
+    WHEN OLD.category_id IS NOT NULL AND OLD.status IS 'approved' BEGIN
+        UPDATE category_stats SET
+            approved_count = approved_count - 1,
+            total_likes = total_likes - coalesce(OLD.likes_count, 0)
+        WHERE category_id = OLD.category_id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS category_stats_meme_update
+    AFTER UPDATE OF status, category_id, likes_count ON memes
+    WHEN (OLD.status IS 'approved' OR NEW.status IS 'approved')
+     AND (OLD.category_id IS NOT NULL OR NEW.category_id IS NOT NULL) BEGIN
+        UPDATE category_stats SET
+            approved_count = approved_count - 1,
+            total_likes = total_likes - coalesce(OLD.likes_count, 0)
+        WHERE category_id = OLD.category_id AND OLD.status IS 'approved';
+        INSERT INTO category_stats (category_id, approved_count, total_likes)
+        SELECT NEW.category_id, 1, coalesce(NEW.likes_count, 0)
+        WHERE NEW.category_id IS NOT NULL AND NEW.status IS 'approved'
+        ON CONFLICT (category_id) DO UPDATE SET
+            approved_count = approved_count + 1,
+            total_likes = total_likes + excluded.total_likes;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS author_stats_meme_insert AFTER INSERT ON memes
+    WHEN NEW.author_id IS NOT NULL BEGIN
+        INSERT INTO author_stats (
+            author_id, approved_count, pending_count, rejected_count, total_likes, total_views
+        )
+        VALUES (
+            NEW.author_id, NEW.status IS 'approved', NEW.status IS 'pending',
+            NEW.status IS 'rejected', coalesce(NEW.likes_count, 0), coalesce(NEW.views_count, 0)
+        )
+        ON CONFLICT (author_id) DO UPDATE SET
+            approved_count = approved_count + excluded.approved_count,
+            pending_count = pending_count + excluded.pending_count,
+            rejected_count = rejected_count + excluded.rejected_count,
+            total_likes = total_likes + excluded.total_likes,
+            total_views = total_views + excluded.total_views;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS author_stats_meme_delete AFTER DELETE ON memes
+    WHEN OLD.author_id IS NOT NULL BEGIN
+        UPDATE author_stats SET
+            approved_count = approved_count - (OLD.status IS 'approved'),
+            pending_count = pending_count - (OLD.status IS 'pending'),
+            rejected_count = rejected_count - (OLD.status IS 'rejected'),
+            total_likes = total_likes - coalesce(OLD.likes_count, 0),
+            total_views = total_views - coalesce(OLD.views_count, 0)
+        WHERE author_id = OLD.author_id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS author_stats_meme_update
+    AFTER UPDATE OF status, author_id, likes_count, views_count ON memes
+    WHEN OLD.author_id IS NOT NULL OR NEW.author_id IS NOT NULL BEGIN
+        UPDATE author_stats SET
+            approved_count = approved_count - (OLD.status IS 'approved'),
+            pending_count = pending_count - (OLD.status IS 'pending'),
+            rejected_count = rejected_count - (OLD.status IS 'rejected'),
+            total_likes = total_likes - coalesce(OLD.likes_count, 0),
+            total_views = total_views - coalesce(OLD.views_count, 0)
+        WHERE author_id = OLD.author_id;
+        INSERT INTO author_stats (
+            author_id, approved_count, pending_count, rejected_count, total_likes, total_views
+        )
+        SELECT NEW.author_id, NEW.status IS 'approved', NEW.status IS 'pending',
+               NEW.status IS 'rejected', coalesce(NEW.likes_count, 0), coalesce(NEW.views_count, 0)
+        WHERE NEW.author_id IS NOT NULL
+        ON CONFLICT (author_id) DO UPDATE SET
+            approved_count = approved_count + excluded.approved_count,
+            pending_count = pending_count + excluded.pending_count,
+            rejected_count = rejected_count + excluded.rejected_count,
+            total_likes = total_likes + excluded.total_likes,
+            total_views = total_views + excluded.total_views;
+    END;
+"""
+
+
+def _rebuild_group_stats(db):
+    """Recompute category_stats and author_stats from memes."""
+    db.execute("DELETE FROM category_stats")
+    db.execute("""
+        INSERT INTO category_stats (category_id, approved_count, total_likes)
+        SELECT category_id, COUNT(*), coalesce(SUM(likes_count), 0)
+        FROM memes
+        WHERE status = 'approved' AND category_id IS NOT NULL
+        GROUP BY category_id
+    """)
+    db.execute("DELETE FROM author_stats")
+    db.execute("""
+        INSERT INTO author_stats (
+            author_id, approved_count, pending_count, rejected_count, total_likes, total_views
+        )
+        SELECT author_id,
+               COUNT(*) FILTER (WHERE status = 'approved'),
+               COUNT(*) FILTER (WHERE status = 'pending'),
+               COUNT(*) FILTER (WHERE status = 'rejected'),
+               coalesce(SUM(likes_count), 0),
+               coalesce(SUM(views_count), 0)
+        FROM memes
+        WHERE author_id IS NOT NULL
+        GROUP BY author_id
+    """)
+
+
+def _group_stats(db):
+    migrations.run_script(db, GROUP_STATS)
+    _rebuild_group_stats(db)
+
+
+def _rebuild_stats(db):
+    """Recompute every materialized counter table."""
+    _rebuild_platform_stats(db)
+    _rebuild_group_stats(db)
+
+
+# "hot" sort: memes.hot_score is refreshed by refresh_hot_scores() for the
+# memes queued here whenever their engagement changes
+HOT_RANKING = """
+    ALTER TABLE memes ADD COLUMN hot_score REAL NOT NULL DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS idx_memes_status_hot ON memes(status, hot_score);
+    
+    CREATE TABLE IF NOT EXISTS hot_queue (meme_id INTEGER PRIMARY KEY);
+    
+    CREATE TRIGGER IF NOT EXISTS hot_queue_meme_insert AFTER INSERT ON memes BEGIN
+        INSERT OR IGNORE INTO hot_queue (meme_id) VALUES (NEW.id);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS hot_queue_meme_update
+    AFTER UPDATE OF likes_count, views_count, shares_count ON memes BEGIN
+        INSERT OR IGNORE INTO hot_queue (meme_id) VALUES (NEW.id);
+    END;
+    
+    INSERT OR IGNORE INTO hot_queue (meme_id) SELECT id FROM memes;
+"""
+
+
+# Resumable uploads in progress; bytes live in uploads.PARTIAL_DIR
+UPLOAD_SESSIONS = """
+    CREATE TABLE IF NOT EXISTS upload_sessions (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        filename TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        title TEXT,
+        description TEXT,
+        category_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_upload_sessions_updated ON upload_sessions(updated_at);
+"""
+
+
+# Precomputed "related memes": up to RELATED_LIMIT neighbours per meme,
+# rebuilt by refresh_related() for memes queued here
+RELATED_MEMES = """
+    CREATE TABLE IF NOT EXISTS related_memes (
+        meme_id INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        related_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY (meme_id, rank)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_related_memes_related ON related_memes(related_id);
+    CREATE INDEX IF NOT EXISTS idx_memes_category_status_hot ON memes(category_id, status, hot_score);
+    
+    CREATE TABLE IF NOT EXISTS related_queue (meme_id INTEGER PRIMARY KEY);
+    
+    CREATE TRIGGER IF NOT EXISTS related_like_insert AFTER INSERT ON likes BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id) VALUES (NEW.meme_id);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS related_like_delete AFTER DELETE ON likes BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id) VALUES (OLD.meme_id);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS related_meme_insert AFTER INSERT ON memes
+    WHEN NEW.status = 'approved' BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id) VALUES (NEW.id);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS related_meme_update AFTER UPDATE OF status, category_id ON memes
+    WHEN NEW.status = 'approved' BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id) VALUES (NEW.id);
+    END;
+    
+    -- A meme leaving the gallery drops its own list and requeues lists it was in
+    CREATE TRIGGER IF NOT EXISTS related_meme_hidden AFTER UPDATE OF status ON memes
+    WHEN OLD.status = 'approved' AND NEW.status != 'approved' BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id)
+            SELECT meme_id FROM related_memes WHERE related_id = OLD.id;
+        DELETE FROM related_memes WHERE meme_id = OLD.id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS related_meme_delete AFTER DELETE ON memes BEGIN
+        INSERT OR IGNORE INTO related_queue (meme_id)
+            SELECT meme_id FROM related_memes WHERE related_id = OLD.id;
+        DELETE FROM related_memes WHERE meme_id = OLD.id;
+        DELETE FROM related_queue WHERE meme_id = OLD.id;
+    END;
+    
+    INSERT OR IGNORE INTO related_queue (meme_id) SELECT id FROM memes WHERE status = 'approved';
+"""
+
+
+MIGRATIONS = [
+    ("baseline schema", _baseline_schema),
+    ("gallery indexes", GALLERY_INDEXES),
+    ("memes full-text search", MEMES_FTS),
+    ("platform stats", _platform_stats),
+    ("category and author stats", _group_stats),
+    ("hot ranking", HOT_RANKING),
+    ("related memes", RELATED_MEMES),
+    ("meme content hash", "ALTER TABLE memes ADD COLUMN content_hash TEXT"),
+    ("upload sessions", UPLOAD_SESSIONS),
+    ("meme variants", "ALTER TABLE memes ADD COLUMN variants TEXT"),
+    ("upload session owner", "ALTER TABLE upload_sessions ADD COLUMN owner TEXT"),
+]
+
+
 async def init_db():
-    """Initialize database with all tables."""
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        # Users table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                telegram_id INTEGER UNIQUE,
-                username TEXT,
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                display_name TEXT,
-                is_admin INTEGER DEFAULT 0,
-                is_banned INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                uploads_today INTEGER DEFAULT 0,
-                uploads_date TEXT
-            )
-        """)
-        
-        # Categories table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                name_en TEXT,
-                description TEXT,
-                icon TEXT DEFAULT '📁',
-                is_active INTEGER DEFAULT 1,
-                sort_order INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Memes table (enhanced)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS memes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                author_id INTEGER,
-                title TEXT,
-                description TEXT,
-                filename TEXT NOT NULL,
-                file_type TEXT DEFAULT 'image',
-                file_size INTEGER DEFAULT 0,
-                category_id INTEGER,
-                status TEXT DEFAULT 'pending',
-                likes_count INTEGER DEFAULT 0,
-                views_count INTEGER DEFAULT 0,
-                shares_count INTEGER DEFAULT 0,
-                is_featured INTEGER DEFAULT 0,
-                moderated_by INTEGER,
-                moderated_at TIMESTAMP,
-                rejection_reason TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (author_id) REFERENCES users(id),
-                FOREIGN KEY (category_id) REFERENCES categories(id),
-                FOREIGN KEY (moderated_by) REFERENCES users(id)
-            )
-        """)
-        
-        # Likes table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS likes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                meme_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (meme_id) REFERENCES memes(id),
-                UNIQUE(user_id, meme_id)
-            )
-        """)
-        
-        # Comments table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS comments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                meme_id INTEGER NOT NULL,
-                text TEXT NOT NULL,
-                is_hidden INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (meme_id) REFERENCES memes(id)
-            )
-        """)
-        
-        # Direct shares table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS shares (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                meme_id INTEGER NOT NULL,
-                sender_id INTEGER NOT NULL,
-                recipient_telegram_id INTEGER,
-                recipient_email TEXT,
-                share_token TEXT UNIQUE,
-                is_viewed INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (meme_id) REFERENCES memes(id),
-                FOREIGN KEY (sender_id) REFERENCES users(id)
-            )
-        """)
-        
-        # Sessions table for web auth
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                token TEXT UNIQUE NOT NULL,
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-        
-        # Activity log
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS activity_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                details TEXT,
-                ip_address TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-        
-        # Reports table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                meme_id INTEGER NOT NULL,
-                reporter_id INTEGER NOT NULL,
-                reason TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                resolved_by INTEGER,
-                resolved_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (meme_id) REFERENCES memes(id),
-                FOREIGN KEY (reporter_id) REFERENCES users(id),
-                FOREIGN KEY (resolved_by) REFERENCES users(id)
-            )
-        """)
-        
-        # Admin login codes table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS admin_codes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER NOT NULL,
-                code TEXT NOT NULL UNIQUE,
-                expires_at TIMESTAMP NOT NULL,
-                used INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Default categories
-        await db.execute("""
-            INSERT OR IGNORE INTO categories (name, name_en, icon, sort_order) VALUES
-            ('Животные', 'Animals', '🐱', 1),
-            ('Политика', 'Politics', '🏛️', 2),
-            ('Приколы', 'Funny', '😂', 3),
-            ('Игры', 'Games', '🎮', 4),
-            ('Кино и ТВ', 'Movies & TV', '🎬', 5),
-            ('IT и программирование', 'IT & Programming', '💻', 6),
-            ('Жизненное', 'Life', '🌍', 7),
-            ('Другое', 'Other', '📦', 8)
-        """)
-        
-        await db.commit()
+    """Apply pending migrations and open the connection pool."""
+    version = await _writer().transaction(lambda db: migrations.migrate(db, MIGRATIONS))
+    logger.debug(f"{DATABASE_PATH.name} schema version {version}")
+    await db_pool.get_pool(DATABASE_PATH)
+
+
+async def close_db():
+    """Flush buffered counters and close pooled connections of the current event loop."""
+    await counters.flush_counters()
+    await db_pool.close_pools()
 
 
 # ═══════════════════════════════════════════════
@@ -198,40 +672,34 @@ async def init_db():
 
 async def get_or_create_user(telegram_id: int, username: str = None) -> dict:
     """Get or create user by telegram_id."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        
-        cursor = await db.execute(
+    def _tx(db):
+        user = db.execute(
             "SELECT * FROM users WHERE telegram_id = ?",
             (telegram_id,)
-        )
-        user = await cursor.fetchone()
+        ).fetchone()
         
         if user:
-            await db.execute(
+            db.execute(
                 "UPDATE users SET last_active = CURRENT_TIMESTAMP, username = ? WHERE telegram_id = ?",
                 (username, telegram_id)
             )
-            await db.commit()
             return dict(user)
         
-        await db.execute(
+        db.execute(
             "INSERT INTO users (telegram_id, username, display_name) VALUES (?, ?, ?)",
             (telegram_id, username, username or f"User{telegram_id}")
         )
-        await db.commit()
-        
-        cursor = await db.execute(
+        return dict(db.execute(
             "SELECT * FROM users WHERE telegram_id = ?",
             (telegram_id,)
-        )
-        return dict(await cursor.fetchone())
+        ).fetchone())
+    
+    return await _writer().transaction(_tx)
 
 
 async def get_user_by_id(user_id: int) -> Optional[dict]:
     """Get user by ID."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM users WHERE id = ?", (user_id,))
         row = await cursor.fetchone()
         return dict(row) if row else None
@@ -239,8 +707,7 @@ async def get_user_by_id(user_id: int) -> Optional[dict]:
 
 async def get_user_by_email(email: str) -> Optional[dict]:
     """Get user by email."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM users WHERE email = ?", (email,))
         row = await cursor.fetchone()
         return dict(row) if row else None
@@ -250,24 +717,18 @@ async def create_web_user(email: str, password: str, display_name: str) -> dict:
     """Create user for web registration."""
     password_hash = hashlib.sha256(password.encode()).hexdigest()
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        await db.execute(
-            "INSERT INTO users (email, password_hash, display_name) VALUES (?, ?, ?)",
-            (email, password_hash, display_name)
-        )
-        await db.commit()
-        
-        cursor = await db.execute("SELECT * FROM users WHERE email = ?", (email,))
-        return dict(await cursor.fetchone())
+    result = await _writer().execute(
+        "INSERT INTO users (email, password_hash, display_name) VALUES (?, ?, ?) RETURNING *",
+        (email, password_hash, display_name)
+    )
+    return dict(result.rows[0])
 
 
 async def verify_password(email: str, password: str) -> Optional[dict]:
     """Verify user password."""
     password_hash = hashlib.sha256(password.encode()).hexdigest()
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT * FROM users WHERE email = ? AND password_hash = ?",
             (email, password_hash)
@@ -285,35 +746,160 @@ async def create_session(user_id: int, hours: int = 24 * 7) -> str:
     token = secrets.token_urlsafe(32)
     expires_at = datetime.now() + timedelta(hours=hours)
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, ?)",
-            (user_id, token, expires_at.isoformat())
-        )
-        await db.commit()
+    await _writer().execute(
+        "INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, ?)",
+        (user_id, token, expires_at.isoformat())
+    )
     
     return token
 
 
+# token -> (reuse until (monotonic), session expiry, session row), LRU order
+_session_cache: OrderedDict[str, tuple[float, Optional[datetime], dict]] = OrderedDict()
+_session_lock = threading.Lock()  # run.py reads sessions from the bot and web loops
+
+
+def _session_expiry(session: dict) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(session["expires_at"])
+    except (TypeError, ValueError):
+        return None
+
+
 async def get_session(token: str) -> Optional[dict]:
-    """Get session by token."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    """Get session (joined with its user) by token; cached for SESSION_CACHE_TTL."""
+    with _session_lock:
+        entry = _session_cache.get(token)
+        if entry is not None:
+            reuse_until, expires_at, session = entry
+            if reuse_until > time.monotonic() and (expires_at is None or expires_at > datetime.now()):
+                _session_cache.move_to_end(token)
+                return dict(session)
+            _session_cache.pop(token, None)
+    
+    async with _read() as db:
         cursor = await db.execute(
             """SELECT s.*, u.* FROM sessions s
                JOIN users u ON s.user_id = u.id
-               WHERE s.token = ? AND s.expires_at > CURRENT_TIMESTAMP""",
+               WHERE s.token = ? AND s.expires_at > CURRENT_TIMESTAMP
+               AND NOT u.is_banned""",
             (token,)
         )
         row = await cursor.fetchone()
-        return dict(row) if row else None
+    if not row:
+        return None
+    
+    session = dict(row)
+    with _session_lock:
+        _session_cache[token] = (time.monotonic() + SESSION_CACHE_TTL, _session_expiry(session), session)
+        if len(_session_cache) > SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+    return dict(session)
+
+
+def invalidate_user_sessions(user_id: int):
+    """Drop cached sessions of a user (after admin rights change)."""
+    with _session_lock:
+        for token in [t for t, (_, _, s) in _session_cache.items() if s["user_id"] == user_id]:
+            _session_cache.pop(token, None)
 
 
 async def delete_session(token: str):
     """Delete session."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM sessions WHERE token = ?", (token,))
-        await db.commit()
+    with _session_lock:
+        _session_cache.pop(token, None)
+    await _writer().execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+
+async def purge_expired(batch: int = SWEEP_BATCH) -> dict:
+    """
+    Delete expired sessions and used or expired admin codes.
+
+    Works in batches of `batch` rows per transaction so the writer is never
+    held for long. Returns the number of deleted rows per table.
+    """
+    # Sessions store local ISO timestamps, admin codes store UTC (see generate_admin_code)
+    jobs = {
+        "sessions": (
+            """DELETE FROM sessions WHERE id IN (
+                   SELECT id FROM sessions WHERE expires_at <= ? LIMIT ?)""",
+            lambda: (datetime.now().isoformat(), batch)
+        ),
+        "admin_codes": (
+            """DELETE FROM admin_codes WHERE id IN (
+                   SELECT id FROM admin_codes
+                   WHERE used = 1 OR expires_at <= CURRENT_TIMESTAMP LIMIT ?)""",
+            lambda: (batch,)
+        ),
+    }
+    deleted = {}
+    for table, (sql, params) in jobs.items():
+        deleted[table] = 0
+        while True:
+            result = await _writer().execute(sql, params())
+            deleted[table] += result.rowcount
+            if result.rowcount < batch:
+                break
+    return deleted
+
+
+# ═══════════════════════════════════════════════
+# UPLOAD SESSIONS
+# ═══════════════════════════════════════════════
+
+async def create_upload_session(
+    user_id: Optional[int],
+    owner: str,
+    filename: str,
+    size: int,
+    title: str = None,
+    description: str = None,
+    category_id: int = None
+) -> str:
+    """Start a resumable upload owned by a browser session (owner); returns its id."""
+    upload_id = secrets.token_urlsafe(24)
+    await _writer().execute(
+        """INSERT INTO upload_sessions (id, user_id, owner, filename, size, title, description, category_id)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (upload_id, user_id, owner, filename, size, title, description, category_id)
+    )
+    return upload_id
+
+
+async def get_upload_session(upload_id: str) -> Optional[dict]:
+    """Get a resumable upload by id."""
+    async with _read() as db:
+        cursor = await db.execute("SELECT * FROM upload_sessions WHERE id = ?", (upload_id,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def touch_upload_session(upload_id: str):
+    """Mark an upload as active so the janitor leaves it alone."""
+    await _writer().execute(
+        "UPDATE upload_sessions SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (upload_id,)
+    )
+
+
+async def delete_upload_session(upload_id: str) -> bool:
+    """Forget a resumable upload."""
+    result = await _writer().execute("DELETE FROM upload_sessions WHERE id = ?", (upload_id,))
+    return result.rowcount > 0
+
+
+async def expire_upload_sessions(ttl: int, batch: int = SWEEP_BATCH) -> list[str]:
+    """Delete uploads idle for ttl seconds; returns their ids so files can go too."""
+    expired = []
+    while True:
+        result = await _writer().execute(
+            """DELETE FROM upload_sessions WHERE id IN (
+                   SELECT id FROM upload_sessions WHERE updated_at <= datetime('now', ?) LIMIT ?)
+               RETURNING id""",
+            (f"-{ttl} seconds", batch)
+        )
+        expired += [row[0] for row in result.rows]
+        if len(result.rows) < batch:
+            return expired
 
 
 # ═══════════════════════════════════════════════
@@ -326,49 +912,37 @@ async def generate_admin_code(telegram_id: int, minutes: int = 10) -> str:
     # Use UTC time to match SQLite CURRENT_TIMESTAMP
     expires_at = datetime.utcnow() + timedelta(minutes=minutes)
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    def _tx(db):
         # Delete old codes for this user
-        await db.execute(
+        db.execute(
             "DELETE FROM admin_codes WHERE telegram_id = ?",
             (telegram_id,)
         )
         # Create new code - use SQLite datetime format (space, not T)
-        await db.execute(
+        db.execute(
             "INSERT INTO admin_codes (telegram_id, code, expires_at) VALUES (?, ?, ?)",
             (telegram_id, code, expires_at.strftime("%Y-%m-%d %H:%M:%S"))
         )
-        await db.commit()
     
+    await _writer().transaction(_tx)
     return code
 
 
 async def verify_admin_code(telegram_id: int, code: str) -> bool:
     """Verify admin login code."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """SELECT * FROM admin_codes 
-               WHERE telegram_id = ? AND code = ? AND used = 0 
-               AND expires_at > CURRENT_TIMESTAMP""",
-            (telegram_id, code)
-        )
-        row = await cursor.fetchone()
-        
-        if row:
-            # Mark code as used
-            await db.execute(
-                "UPDATE admin_codes SET used = 1 WHERE telegram_id = ? AND code = ?",
-                (telegram_id, code)
-            )
-            await db.commit()
-            return True
-        
-        return False
+    # Check and mark as used in one statement, so a code can't be used twice
+    result = await _writer().execute(
+        """UPDATE admin_codes SET used = 1
+           WHERE telegram_id = ? AND code = ? AND used = 0 
+           AND expires_at > CURRENT_TIMESTAMP""",
+        (telegram_id, code)
+    )
+    return result.rowcount > 0
 
 
 async def get_user_by_telegram_id(telegram_id: int) -> Optional[dict]:
     """Get user by telegram ID."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT * FROM users WHERE telegram_id = ?",
             (telegram_id,)
@@ -379,40 +953,33 @@ async def get_user_by_telegram_id(telegram_id: int) -> Optional[dict]:
 
 async def ensure_admin_user(telegram_id: int, username: str = None) -> dict:
     """Ensure admin user exists in database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        
-        cursor = await db.execute(
+    def _tx(db):
+        user = db.execute(
             "SELECT * FROM users WHERE telegram_id = ?",
             (telegram_id,)
-        )
-        user = await cursor.fetchone()
+        ).fetchone()
         
         if user:
             # Update admin status
-            await db.execute(
+            db.execute(
                 "UPDATE users SET is_admin = 1, last_active = CURRENT_TIMESTAMP WHERE telegram_id = ?",
                 (telegram_id,)
             )
-            await db.commit()
-            cursor = await db.execute(
-                "SELECT * FROM users WHERE telegram_id = ?",
-                (telegram_id,)
+        else:
+            # Create new admin user
+            db.execute(
+                "INSERT INTO users (telegram_id, username, display_name, is_admin) VALUES (?, ?, ?, 1)",
+                (telegram_id, username, username or f"Admin{telegram_id}")
             )
-            return dict(await cursor.fetchone())
-        
-        # Create new admin user
-        await db.execute(
-            "INSERT INTO users (telegram_id, username, display_name, is_admin) VALUES (?, ?, ?, 1)",
-            (telegram_id, username, username or f"Admin{telegram_id}")
-        )
-        await db.commit()
         
-        cursor = await db.execute(
+        return dict(db.execute(
             "SELECT * FROM users WHERE telegram_id = ?",
             (telegram_id,)
-        )
-        return dict(await cursor.fetchone())
+        ).fetchone())
+    
+    user = await _writer().transaction(_tx)
+    invalidate_user_sessions(user["id"])
+    return user
 
 
 # ═══════════════════════════════════════════════
@@ -421,8 +988,7 @@ async def ensure_admin_user(telegram_id: int, username: str = None) -> dict:
 
 async def get_categories() -> list:
     """Get all active categories."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT * FROM categories WHERE is_active = 1 ORDER BY sort_order"
         )
@@ -431,8 +997,7 @@ async def get_categories() -> list:
 
 async def get_category_by_id(category_id: int) -> Optional[dict]:
     """Get category by ID."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute("SELECT * FROM categories WHERE id = ?", (category_id,))
         row = await cursor.fetchone()
         return dict(row) if row else None
@@ -440,32 +1005,30 @@ async def get_category_by_id(category_id: int) -> Optional[dict]:
 
 async def create_category(name: str, name_en: str = None, icon: str = "📁", description: str = None) -> int:
     """Create new category."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "INSERT INTO categories (name, name_en, icon, description) VALUES (?, ?, ?, ?)",
-            (name, name_en, icon, description)
-        )
-        await db.commit()
-        return cursor.lastrowid
+    result = await _writer().execute(
+        "INSERT INTO categories (name, name_en, icon, description) VALUES (?, ?, ?, ?)",
+        (name, name_en, icon, description)
+    )
+    return result.lastrowid
 
 
 async def update_category(category_id: int, **kwargs):
     """Update category fields."""
     if not kwargs:
         return
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
-        values = list(kwargs.values()) + [category_id]
-        await db.execute(f"UPDATE categories SET {fields} WHERE id = ?", values)
-        await db.commit()
+    fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
+    values = list(kwargs.values()) + [category_id]
+    await _writer().execute(f"UPDATE categories SET {fields} WHERE id = ?", values)
 
 
 async def delete_category(category_id: int):
     """Delete category."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("UPDATE memes SET category_id = NULL WHERE category_id = ?", (category_id,))
-        await db.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-        await db.commit()
+    def _tx(db):
+        db.execute("UPDATE memes SET category_id = NULL WHERE category_id = ?", (category_id,))
+        db.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+    
+    await _writer().transaction(_tx)
+    _invalidate_counts()
 
 
 # ═══════════════════════════════════════════════
@@ -480,24 +1043,25 @@ async def create_meme(
     category_id: int = None,
     file_type: str = "image",
     file_size: int = 0,
-    status: str = "pending"
+    status: str = "pending",
+    content_hash: str = None
 ) -> int:
     """Create new meme."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """INSERT INTO memes 
-               (author_id, filename, title, description, category_id, file_type, file_size, status)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (author_id, filename, title, description, category_id, file_type, file_size, status)
-        )
-        await db.commit()
-        return cursor.lastrowid
+    result = await _writer().execute(
+        """INSERT INTO memes 
+           (author_id, filename, title, description, category_id, file_type, file_size, status,
+            content_hash)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (author_id, filename, title, description, category_id, file_type, file_size, status,
+         content_hash)
+    )
+    _invalidate_counts()
+    return result.lastrowid
 
 
 async def get_meme_by_id(meme_id: int) -> Optional[dict]:
     """Get meme by ID with author and category info."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read() as db:
         cursor = await db.execute(
             """SELECT m.*, u.username as author_name, u.display_name as author_display,
                       c.name as category_name, c.icon as category_icon
@@ -508,9 +1072,137 @@ async def get_meme_by_id(meme_id: int) -> Optional[dict]:
             (meme_id,)
         )
         row = await cursor.fetchone()
+    if not row:
+        return None
+    return _meme_rows([dict(row)])[0]
+
+
+async def get_meme_file(meme_id: int) -> Optional[dict]:
+    """File info of a meme, for media routes."""
+    async with _read() as db:
+        cursor = await db.execute(
+            "SELECT id, filename, file_type, content_hash FROM memes WHERE id = ?", (meme_id,)
+        )
+        row = await cursor.fetchone()
         return dict(row) if row else None
 
 
+def _meme_rows(rows: list[dict]) -> list[dict]:
+    """Finish fetched meme rows: decode variants, add pending counter deltas."""
+    for row in rows:
+        if isinstance(row.get("variants"), str):
+            row["variants"] = json.loads(row["variants"])
+    return _counters().merge("memes", rows)
+
+
+async def set_meme_variants(meme_id: int, variants: Optional[dict]) -> bool:
+    """Store rendered image variants ({size: {width, height, webp, jpeg}})."""
+    result = await _writer().execute(
+        "UPDATE memes SET variants = ? WHERE id = ?",
+        (json.dumps(variants) if variants else None, meme_id)
+    )
+    return result.rowcount > 0
+
+
+async def get_memes_without_variants(after_id: int = 0, limit: int = 100) -> list:
+    """Image memes with no variants yet, by id (for backfilling)."""
+    async with _read() as db:
+        cursor = await db.execute(
+            """SELECT id, filename FROM memes
+               WHERE id > ? AND variants IS NULL AND file_type = 'image'
+               ORDER BY id LIMIT ?""",
+            (after_id, limit)
+        )
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+def _fts_query(search: str) -> Optional[str]:
+    """Turn user input into an FTS5 prefix query: 'Ёжик в' -> '"ежик"* "в"*'."""
+    words = re.findall(r"[^\W_]+", search.lower().replace("ё", "е"))
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def _meme_filters(
+    status: str = None,
+    category_id: int = None,
+    author_id: int = None,
+    search: str = None
+) -> tuple[str, str, list]:
+    """Build (join, where, params) shared by meme listing and counting."""
+    join = ""
+    conditions = ["1=1"]
+    params = []
+    
+    if status:
+        conditions.append("m.status = ?")
+        params.append(status)
+    
+    if category_id:
+        conditions.append("m.category_id = ?")
+        params.append(category_id)
+    
+    if author_id:
+        conditions.append("m.author_id = ?")
+        params.append(author_id)
+    
+    if search and search.strip():
+        fts_query = _fts_query(search)
+        if fts_query:
+            join = " JOIN memes_fts ON memes_fts.rowid = m.id"
+            conditions.append("memes_fts MATCH ?")
+            params.append(fts_query)
+        else:
+            conditions.append("0")  # Nothing searchable (only punctuation)
+    
+    return join, " AND ".join(conditions), params
+
+
+# Sort key per sort_by; keyset pages continue after (key, id) of the last row
+_SORT_KEYS = {
+    "created_at": "m.created_at",
+    "likes_count": "m.likes_count",
+    "views_count": "m.views_count",
+    "title": "COALESCE(m.title, '')",
+    "hot_score": "m.hot_score",
+}
+_SORT_ALIASES = {"hot": "hot_score"}
+
+
+def _encode_cursor(data: dict) -> str:
+    """Pack a page position into an opaque URL-safe token."""
+    raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_order: str) -> dict:
+    """Unpack a cursor; raises ValueError if it is malformed or from another sort."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(data, dict) or data.get("s") != sort_by or data.get("o") != sort_order:
+        raise ValueError("Cursor does not match the requested sort")
+    if sort_by == "relevance":
+        if not isinstance(data.get("n"), int) or data["n"] < 0:
+            raise ValueError("Invalid cursor")
+    elif data.get("d") not in ("after", "before") or not (
+        isinstance(data.get("k"), list) and len(data["k"]) == 2 and isinstance(data["k"][1], int)
+    ):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def _sort_params(sort_by: str, sort_order: str, relevance: bool) -> tuple[str, str]:
+    """Normalize sort_by/sort_order the same way for queries and cursors."""
+    if sort_by == "relevance" and relevance:
+        return "relevance", "DESC"
+    sort_by = _SORT_ALIASES.get(sort_by, sort_by)
+    # Validate sort_by to prevent SQL injection
+    if sort_by not in _SORT_KEYS:
+        sort_by = "created_at"
+    return sort_by, "DESC" if sort_order.upper() == "DESC" else "ASC"
+
+
 async def get_memes(
     status: str = "approved",
     category_id: int = None,
@@ -519,80 +1211,282 @@ async def get_memes(
     sort_by: str = "created_at",
     sort_order: str = "DESC",
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: str = None,
+    with_total: bool = False
+) -> list:
+    """
+    Get memes with filters; see _select_memes. Counters include pending
+    (not yet flushed) deltas.
+    """
+    return _meme_rows(await _select_memes(
+        status, category_id, author_id, search, sort_by, sort_order,
+        limit, offset, cursor, with_total
+    ))
+
+
+async def _select_memes(
+    status: str = "approved",
+    category_id: int = None,
+    author_id: int = None,
+    search: str = None,
+    sort_by: str = "created_at",
+    sort_order: str = "DESC",
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str = None,
+    with_total: bool = False
 ) -> list:
-    """Get memes with filters."""
-    query = """
+    """
+    Meme rows as stored (counters without pending deltas). sort_by="relevance"
+    ranks search hits by bm25.
+
+    With a cursor (see get_memes_page) rows continue from that position and
+    offset is ignored; rows always come back in display order. with_total
+    adds a total_count column (rows matching the filters and the cursor,
+    before LIMIT) from the same query.
+    """
+    join, where, params = _meme_filters(status, category_id, author_id, search)
+    sort_by, sort_order = _sort_params(sort_by, sort_order, bool(join))
+    position = _decode_cursor(cursor, sort_by, sort_order) if cursor else None
+    
+    before = False
+    if sort_by == "relevance":
+        # bm25 isn't a stable key, so relevance cursors carry an offset
+        order = "bm25(memes_fts, 10.0, 1.0), m.id DESC"
+        if position:
+            offset = position["n"]
+    else:
+        key = _SORT_KEYS[sort_by]
+        before = bool(position) and position["d"] == "before"
+        descending = (sort_order == "DESC") != before
+        direction = "DESC" if descending else "ASC"
+        order = f"{key} {direction}, m.id {direction}"
+        if position:
+            where += f" AND ({key}, m.id) {'<' if descending else '>'} (?, ?)"
+            params.extend(position["k"])
+            offset = 0
+    
+    total = ", COUNT(*) OVER () as total_count" if with_total else ""
+    query = f"""
         SELECT m.*, u.username as author_name, u.display_name as author_display,
-               c.name as category_name, c.icon as category_icon
-        FROM memes m
+               c.name as category_name, c.icon as category_icon{total}
+        FROM memes m{join}
         LEFT JOIN users u ON m.author_id = u.id
         LEFT JOIN categories c ON m.category_id = c.id
-        WHERE 1=1
+        WHERE {where}
+        ORDER BY {order} LIMIT ? OFFSET ?
     """
-    params = []
+    params.extend([limit, offset])
     
-    if status:
-        query += " AND m.status = ?"
-        params.append(status)
+    async with _read() as db:
+        cursor = await db.execute(query, params)
+        rows = [dict(row) for row in await cursor.fetchall()]
+    if before:
+        rows.reverse()
+    return rows
+
+
+async def get_memes_page(
+    status: str = "approved",
+    category_id: int = None,
+    author_id: int = None,
+    search: str = None,
+    sort_by: str = "created_at",
+    sort_order: str = "DESC",
+    limit: int = 24,
+    cursor: str = None,
+    offset: int = 0,
+    with_total: bool = False,
+    approximate: bool = False
+) -> dict:
+    """
+    One page of memes plus opaque cursors for the neighbouring pages.
+
+    Returns {"memes", "next_cursor", "prev_cursor"}; a cursor is None when
+    there is no page in that direction. Raises ValueError for a bad cursor.
+    offset is only used without a cursor (old page-number links).
+
+    with_total adds "total" and "total_exact". The total comes from the
+    counter tables, the count cache, or a window count on the page query
+    itself; approximate=True caps it at COUNT_APPROX_LIMIT instead
+    (total_exact is then False for capped totals).
+    """
+    join, _, _ = _meme_filters(status, category_id, author_id, search)
+    sort_by, sort_order = _sort_params(sort_by, sort_order, bool(join))
+    position = _decode_cursor(cursor, sort_by, sort_order) if cursor else None
     
-    if category_id:
-        query += " AND m.category_id = ?"
-        params.append(category_id)
+    total = None
+    key = _count_key(status, category_id, author_id, search)
+    if with_total and not (search and search.strip()):
+        stored = await _stored_count(status, category_id, author_id)
+        total = (stored, True) if stored is not None else None
+    if with_total and total is None:
+        total = _cached_count(key, approximate)
+    # Count in the page query when it sees the whole result set (SQLite
+    # can't combine bm25() with window functions, so not for relevance)
+    window = (
+        with_total and total is None and not approximate
+        and not position and not offset and sort_by != "relevance"
+    )
     
-    if author_id:
-        query += " AND m.author_id = ?"
-        params.append(author_id)
+    # One extra row tells whether there is more in the direction we're going
+    rows = await _select_memes(
+        status=status, category_id=category_id, author_id=author_id, search=search,
+        sort_by=sort_by, sort_order=sort_order, limit=limit + 1, offset=offset,
+        cursor=cursor, with_total=window
+    )
     
-    if search:
-        query += " AND (m.title LIKE ? OR m.description LIKE ?)"
-        params.extend([f"%{search}%", f"%{search}%"])
+    page = {}
+    if window:
+        count = rows[0]["total_count"] if rows else 0
+        for row in rows:
+            del row["total_count"]
+        _cache_count(key, count)
+        total = (count, True)
+    elif with_total and total is None:
+        total = await count_memes_estimate(status, category_id, author_id, search, approximate)
+    if with_total:
+        page["total"], page["total_exact"] = total
     
-    # Validate sort_by to prevent SQL injection
-    valid_sorts = ["created_at", "likes_count", "views_count", "title"]
-    if sort_by not in valid_sorts:
-        sort_by = "created_at"
+    if sort_by == "relevance":
+        start = position["n"] if position else offset
+        memes = rows[:limit]
+        base = {"s": sort_by, "o": sort_order}
+        return {
+            "memes": _meme_rows(memes),
+            "next_cursor": _encode_cursor({**base, "n": start + limit}) if len(rows) > limit else None,
+            "prev_cursor": _encode_cursor({**base, "n": max(0, start - limit)}) if start else None,
+            **page,
+        }
     
-    sort_order = "DESC" if sort_order.upper() == "DESC" else "ASC"
-    query += f" ORDER BY m.{sort_by} {sort_order} LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
+    going_back = bool(position) and position["d"] == "before"
+    if going_back:
+        memes = rows[-limit:]
+        has_next, has_prev = True, len(rows) > limit
+    else:
+        memes = rows[:limit]
+        has_next, has_prev = len(rows) > limit, position is not None or offset > 0
+    
+    def _cursor(row: dict, direction: str) -> str:
+        value = (row["title"] or "") if sort_by == "title" else row[sort_by]
+        return _encode_cursor({"s": sort_by, "o": sort_order, "d": direction, "k": [value, row["id"]]})
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    # Cursors hold the stored sort values the WHERE clause compares against,
+    # so they are taken before pending counter deltas are merged in
+    next_cursor = _cursor(memes[-1], "after") if memes and has_next else None
+    prev_cursor = _cursor(memes[0], "before") if memes and has_prev else None
+    return {
+        "memes": _meme_rows(memes),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        **page,
+    }
+
+
+# Filtered counts: (status, category_id, author_id, fts query) -> (expires, count, exact)
+_count_cache: dict[tuple, tuple[float, int, bool]] = {}
+_COUNT_CACHE_SIZE = 512
+
+
+def _count_key(status, category_id, author_id, search) -> tuple:
+    search = _fts_query(search) if search and search.strip() else None
+    return status, category_id or None, author_id or None, search
+
+
+def _cached_count(key: tuple, approximate: bool = False) -> Optional[tuple[int, bool]]:
+    """(count, exact) if cached, fresh, and exact enough for the caller."""
+    entry = _count_cache.get(key)
+    if entry is None or entry[0] < time.monotonic() or not (entry[2] or approximate):
+        return None
+    return entry[1], entry[2]
+
+
+def _cache_count(key: tuple, count: int, exact: bool = True):
+    if len(_count_cache) >= _COUNT_CACHE_SIZE:
+        _count_cache.pop(next(iter(_count_cache)), None)
+    _count_cache[key] = (time.monotonic() + COUNT_CACHE_TTL, count, exact)
+
+
+def _invalidate_counts():
+    """Forget cached counts after memes change status or disappear."""
+    _count_cache.clear()
+
+
+async def _stored_count(status, category_id, author_id) -> Optional[int]:
+    """Count from the maintained counter tables, if the filter maps onto one."""
+    statuses = ("approved", "pending", "rejected")
+    if status not in statuses + (None,):
+        return None
+    
+    if not category_id and not author_id:
+        column = f"{status}_memes" if status else "total_memes"
+        query, params = f"SELECT {column} FROM platform_stats WHERE id = 1", ()
+    elif category_id and not author_id and status == "approved":
+        query, params = "SELECT approved_count FROM category_stats WHERE category_id = ?", (category_id,)
+    elif author_id and not category_id:
+        column = f"{status}_count" if status else " + ".join(f"{s}_count" for s in statuses)
+        query, params = f"SELECT {column} FROM author_stats WHERE author_id = ?", (author_id,)
+    else:
+        return None
+    
+    async with _read() as db:
         cursor = await db.execute(query, params)
-        return [dict(row) for row in await cursor.fetchall()]
+        row = await cursor.fetchone()
+    return row[0] if row else 0
 
 
 async def count_memes(
     status: str = "approved",
     category_id: int = None,
     author_id: int = None,
-    search: str = None
+    search: str = None,
+    approximate: bool = False
 ) -> int:
-    """Count memes with filters."""
-    query = "SELECT COUNT(*) FROM memes m WHERE 1=1"
-    params = []
+    """
+    Count memes with filters.
+
+    Plain status/category/author filters are read from the counter tables;
+    anything else is counted once and cached for COUNT_CACHE_TTL seconds.
+    approximate=True stops counting at COUNT_APPROX_LIMIT (see
+    count_memes_estimate for telling a capped result apart).
+    """
+    count, _ = await count_memes_estimate(status, category_id, author_id, search, approximate)
+    return count
+
+
+async def count_memes_estimate(
+    status: str = "approved",
+    category_id: int = None,
+    author_id: int = None,
+    search: str = None,
+    approximate: bool = True
+) -> tuple[int, bool]:
+    """Like count_memes but returns (count, exact); inexact means "at least"."""
+    if not (search and search.strip()):
+        count = await _stored_count(status, category_id, author_id)
+        if count is not None:
+            return count, True
     
-    if status:
-        query += " AND m.status = ?"
-        params.append(status)
+    key = _count_key(status, category_id, author_id, search)
+    cached = _cached_count(key, approximate)
+    if cached:
+        return cached
     
-    if category_id:
-        query += " AND m.category_id = ?"
-        params.append(category_id)
+    join, where, params = _meme_filters(status, category_id, author_id, search)
+    if approximate:
+        query = f"SELECT COUNT(*) FROM (SELECT 1 FROM memes m{join} WHERE {where} LIMIT ?)"
+        params.append(COUNT_APPROX_LIMIT)
+    else:
+        query = f"SELECT COUNT(*) FROM memes m{join} WHERE {where}"
     
-    if author_id:
-        query += " AND m.author_id = ?"
-        params.append(author_id)
-    
-    if search:
-        query += " AND (m.title LIKE ? OR m.description LIKE ?)"
-        params.extend([f"%{search}%", f"%{search}%"])
-    
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute(query, params)
         row = await cursor.fetchone()
-        return row[0] if row else 0
+    count = row[0] if row else 0
+    exact = not approximate or count < COUNT_APPROX_LIMIT
+    _cache_count(key, count, exact)
+    return count, exact
 
 
 async def get_pending_memes(limit: int = 50) -> list:
@@ -607,34 +1501,43 @@ async def get_user_memes(user_id: int, status: str = None) -> list:
 
 async def approve_meme(meme_id: int, moderator_id: int):
     """Approve meme."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            """UPDATE memes SET status = 'approved', moderated_by = ?, 
-               moderated_at = CURRENT_TIMESTAMP WHERE id = ?""",
-            (moderator_id, meme_id)
-        )
-        await db.commit()
+    await _writer().execute(
+        """UPDATE memes SET status = 'approved', moderated_by = ?, 
+           moderated_at = CURRENT_TIMESTAMP WHERE id = ?""",
+        (moderator_id, meme_id)
+    )
+    _invalidate_counts()
 
 
 async def reject_meme(meme_id: int, moderator_id: int, reason: str = None):
     """Reject meme."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            """UPDATE memes SET status = 'rejected', moderated_by = ?, 
-               moderated_at = CURRENT_TIMESTAMP, rejection_reason = ? WHERE id = ?""",
-            (moderator_id, reason, meme_id)
+    await _writer().execute(
+        """UPDATE memes SET status = 'rejected', moderated_by = ?, 
+           moderated_at = CURRENT_TIMESTAMP, rejection_reason = ? WHERE id = ?""",
+        (moderator_id, reason, meme_id)
+    )
+    _invalidate_counts()
+
+
+def _delete_memes(db, meme_ids: list) -> dict[int, str]:
+    """Delete memes and their child rows; returns {id: filename} of deleted ones."""
+    ids = json.dumps(meme_ids)
+    for table in ("likes", "comments", "shares"):
+        db.execute(
+            f"DELETE FROM {table} WHERE meme_id IN (SELECT value FROM json_each(?))", (ids,)
         )
-        await db.commit()
+    rows = db.execute(
+        "DELETE FROM memes WHERE id IN (SELECT value FROM json_each(?)) RETURNING id, filename",
+        (ids,)
+    ).fetchall()
+    return {row["id"]: row["filename"] for row in rows}
 
 
-async def delete_meme(meme_id: int):
-    """Delete meme."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM likes WHERE meme_id = ?", (meme_id,))
-        await db.execute("DELETE FROM comments WHERE meme_id = ?", (meme_id,))
-        await db.execute("DELETE FROM shares WHERE meme_id = ?", (meme_id,))
-        await db.execute("DELETE FROM memes WHERE id = ?", (meme_id,))
-        await db.commit()
+async def delete_meme(meme_id: int) -> Optional[str]:
+    """Delete meme; returns its filename (None if it didn't exist)."""
+    deleted = await _writer().transaction(lambda db: _delete_memes(db, [meme_id]))
+    _invalidate_counts()
+    return deleted.get(meme_id)
 
 
 async def update_meme(meme_id: int, **kwargs):
@@ -648,84 +1551,100 @@ async def update_meme(meme_id: int, **kwargs):
     set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
     values = list(updates.values()) + [meme_id]
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            f"UPDATE memes SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            values
-        )
-        await db.commit()
+    await _writer().execute(
+        f"UPDATE memes SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        values
+    )
+    _invalidate_counts()
 
 
 async def increment_views(meme_id: int):
-    """Increment view count."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "UPDATE memes SET views_count = views_count + 1 WHERE id = ?",
-            (meme_id,)
-        )
-        await db.commit()
+    """Increment view count (buffered, see counters)."""
+    _counters().add("memes", "views_count", meme_id)
 
 
 # ═══════════════════════════════════════════════
 # LIKE FUNCTIONS
 # ═══════════════════════════════════════════════
 
-async def toggle_like(user_id: int, meme_id: int) -> bool:
-    """Toggle like on meme. Returns True if liked, False if unliked."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id FROM likes WHERE user_id = ? AND meme_id = ?",
-            (user_id, meme_id)
-        )
-        existing = await cursor.fetchone()
-        
-        if existing:
-            await db.execute(
-                "DELETE FROM likes WHERE user_id = ? AND meme_id = ?",
+async def toggle_like(user_id: int, meme_id: int, liked: bool = None) -> dict:
+    """
+    Toggle a like, or set it when liked is given (idempotent, safe to repeat).
+
+    Returns {"liked", "likes_count"}; raises LookupError if the meme is gone.
+    The counter only moves when a likes row was actually added or removed.
+    """
+    def _tx(db):
+        if liked is None:
+            removed = db.execute(
+                "DELETE FROM likes WHERE user_id = ? AND meme_id = ? RETURNING id",
                 (user_id, meme_id)
-            )
-            await db.execute(
-                "UPDATE memes SET likes_count = likes_count - 1 WHERE id = ?",
-                (meme_id,)
-            )
-            await db.commit()
-            return False
+            ).fetchone()
+            if removed is None:
+                db.execute(
+                    "INSERT INTO likes (user_id, meme_id) VALUES (?, ?)",
+                    (user_id, meme_id)
+                )
+            now_liked, delta = removed is None, (-1 if removed else 1)
+        elif liked:
+            changed = db.execute(
+                """INSERT INTO likes (user_id, meme_id) VALUES (?, ?)
+                   ON CONFLICT (user_id, meme_id) DO NOTHING RETURNING id""",
+                (user_id, meme_id)
+            ).fetchone() is not None
+            now_liked, delta = True, 1 if changed else 0
         else:
-            await db.execute(
-                "INSERT INTO likes (user_id, meme_id) VALUES (?, ?)",
+            changed = db.execute(
+                "DELETE FROM likes WHERE user_id = ? AND meme_id = ? RETURNING id",
                 (user_id, meme_id)
-            )
-            await db.execute(
-                "UPDATE memes SET likes_count = likes_count + 1 WHERE id = ?",
-                (meme_id,)
-            )
-            await db.commit()
-            return True
+            ).fetchone() is not None
+            now_liked, delta = False, -1 if changed else 0
+        
+        row = db.execute(
+            "UPDATE memes SET likes_count = likes_count + ? WHERE id = ? RETURNING likes_count",
+            (delta, meme_id)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"Meme {meme_id} not found")  # Rolls the like back too
+        return {"liked": now_liked, "likes_count": row[0]}
+    
+    result = await _writer().transaction(_tx)
+    result["likes_count"] += _counters().pending("memes", "likes_count", meme_id)
+    return result
 
 
-async def increment_meme_likes(meme_id: int) -> None:
-    """Increment likes for anonymous users."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "UPDATE memes SET likes_count = likes_count + 1 WHERE id = ?",
-            (meme_id,)
-        )
-        await db.commit()
+async def increment_meme_likes(meme_id: int) -> Optional[int]:
+    """Increment likes for anonymous users (buffered); returns the live count."""
+    async with _read() as db:
+        cursor = await db.execute("SELECT likes_count FROM memes WHERE id = ?", (meme_id,))
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    _counters().add("memes", "likes_count", meme_id)
+    return (row[0] or 0) + _counters().pending("memes", "likes_count", meme_id)
 
 
 async def increment_meme_views(meme_id: int) -> None:
-    """Increment views count."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "UPDATE memes SET views_count = views_count + 1 WHERE id = ?",
-            (meme_id,)
+    """Increment views count (buffered)."""
+    _counters().add("memes", "views_count", meme_id)
+
+
+async def liked_ids(user_id: int, meme_ids: list) -> set[int]:
+    """Which of meme_ids the user has liked, in one query (whole page at once)."""
+    if not user_id or not meme_ids:
+        return set()
+    async with _read() as db:
+        cursor = await db.execute(
+            """SELECT meme_id FROM likes
+               WHERE user_id = ? AND meme_id IN (SELECT value FROM json_each(?))""",
+            (user_id, json.dumps(list(meme_ids)))
         )
-        await db.commit()
+        return {row[0] for row in await cursor.fetchall()}
 
 
 async def has_liked(user_id: int, meme_id: int) -> bool:
     """Check if user liked meme."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read() as db:
         cursor = await db.execute(
             "SELECT id FROM likes WHERE user_id = ? AND meme_id = ?",
             (user_id, meme_id)
@@ -741,41 +1660,34 @@ async def create_share(meme_id: int, sender_id: int, recipient_telegram_id: int
     """Create share link."""
     token = secrets.token_urlsafe(16)
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            """INSERT INTO shares (meme_id, sender_id, recipient_telegram_id, share_token)
-               VALUES (?, ?, ?, ?)""",
-            (meme_id, sender_id, recipient_telegram_id, token)
-        )
-        await db.execute(
-            "UPDATE memes SET shares_count = shares_count + 1 WHERE id = ?",
-            (meme_id,)
-        )
-        await db.commit()
-    
+    await _writer().execute(
+        """INSERT INTO shares (meme_id, sender_id, recipient_telegram_id, share_token)
+           VALUES (?, ?, ?, ?)""",
+        (meme_id, sender_id, recipient_telegram_id, token)
+    )
+    _counters().add("memes", "shares_count", meme_id)
     return token
 
 
 async def get_share_by_token(token: str) -> Optional[dict]:
     """Get share by token."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
+    def _tx(db):
+        row = db.execute(
             """SELECT s.*, m.*, u.display_name as sender_name
                FROM shares s
                JOIN memes m ON s.meme_id = m.id
                JOIN users u ON s.sender_id = u.id
                WHERE s.share_token = ?""",
             (token,)
-        )
-        row = await cursor.fetchone()
+        ).fetchone()
         if row:
-            await db.execute(
+            db.execute(
                 "UPDATE shares SET is_viewed = 1 WHERE share_token = ?",
                 (token,)
             )
-            await db.commit()
         return dict(row) if row else None
+    
+    return await _writer().transaction(_tx)
 
 
 # ═══════════════════════════════════════════════
@@ -783,52 +1695,36 @@ async def get_share_by_token(token: str) -> Optional[dict]:
 # ═══════════════════════════════════════════════
 
 async def get_stats() -> dict:
-    """Get platform statistics."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        stats = {}
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM users")
-        stats["total_users"] = (await cursor.fetchone())[0]
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM memes")
-        stats["total_memes"] = (await cursor.fetchone())[0]
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM memes WHERE status = 'approved'")
-        stats["approved_memes"] = (await cursor.fetchone())[0]
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM memes WHERE status = 'pending'")
-        stats["pending_memes"] = (await cursor.fetchone())[0]
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM memes WHERE status = 'rejected'")
-        stats["rejected_memes"] = (await cursor.fetchone())[0]
-        
-        cursor = await db.execute("SELECT SUM(likes_count) FROM memes")
-        stats["total_likes"] = (await cursor.fetchone())[0] or 0
-        
-        cursor = await db.execute("SELECT SUM(views_count) FROM memes")
-        stats["total_views"] = (await cursor.fetchone())[0] or 0
-        
-        cursor = await db.execute("SELECT SUM(shares_count) FROM memes")
-        stats["total_shares"] = (await cursor.fetchone())[0] or 0
-        
-        cursor = await db.execute("SELECT COUNT(*) FROM reports WHERE status = 'open'")
-        stats["open_reports"] = (await cursor.fetchone())[0]
-        
-        # Today's activity
-        today = datetime.now().date().isoformat()
-        cursor = await db.execute(
-            "SELECT COUNT(*) FROM memes WHERE DATE(created_at) = ?",
-            (today,)
-        )
-        stats["today_uploads"] = (await cursor.fetchone())[0]
-        
+    """Get platform statistics (maintained by triggers, see PLATFORM_STATS)."""
+    today = datetime.now().date().isoformat()
+    async with _read() as db:
         cursor = await db.execute(
-            "SELECT COUNT(*) FROM users WHERE DATE(created_at) = ?",
+            """SELECT p.*, coalesce(d.uploads, 0) AS today_uploads,
+                      coalesce(d.signups, 0) AS users_today
+               FROM platform_stats p
+               LEFT JOIN daily_stats d ON d.day = ?
+               WHERE p.id = 1""",
             (today,)
         )
-        stats["users_today"] = (await cursor.fetchone())[0]
-        
-        return stats
+        row = await cursor.fetchone()
+    
+    stats = dict(row) if row else {}
+    stats.pop("id", None)
+    # Buffered counter increments that haven't been flushed yet
+    for key, column in (("total_likes", "likes_count"), ("total_views", "views_count"),
+                        ("total_shares", "shares_count")):
+        stats[key] = stats.get(key, 0) + _counters().total("memes", column)
+    return stats
+
+
+async def rebuild_stats():
+    """Recompute the materialized statistics from scratch."""
+    await _writer().transaction(_rebuild_stats)
+
+
+async def get_hot_memes(limit: int = 10, category_id: int = None) -> list:
+    """Get approved memes ranked by hot_score."""
+    return await get_memes(status="approved", category_id=category_id, sort_by="hot_score", limit=limit)
 
 
 async def get_top_memes(limit: int = 10) -> list:
@@ -837,49 +1733,227 @@ async def get_top_memes(limit: int = 10) -> list:
 
 
 async def get_category_stats() -> list:
-    """Get meme count per category."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    """Get approved meme count (and likes) per category."""
+    async with _read() as db:
         cursor = await db.execute(
-            """SELECT c.*, COUNT(m.id) as meme_count
+            """SELECT c.*, coalesce(s.approved_count, 0) as meme_count,
+                      coalesce(s.total_likes, 0) as total_likes
                FROM categories c
-               LEFT JOIN memes m ON c.id = m.category_id AND m.status = 'approved'
+               LEFT JOIN category_stats s ON s.category_id = c.id
                WHERE c.is_active = 1
-               GROUP BY c.id
                ORDER BY meme_count DESC"""
         )
         return [dict(row) for row in await cursor.fetchall()]
 
 
+async def get_author_stats(user_id: int) -> dict:
+    """Meme counts by status plus likes/views received for one author."""
+    async with _read() as db:
+        cursor = await db.execute(
+            "SELECT * FROM author_stats WHERE author_id = ?", (user_id,)
+        )
+        row = await cursor.fetchone()
+    
+    stats = dict(row) if row else {
+        "author_id": user_id, "approved_count": 0, "pending_count": 0,
+        "rejected_count": 0, "total_likes": 0, "total_views": 0
+    }
+    stats["total_memes"] = stats["approved_count"] + stats["pending_count"] + stats["rejected_count"]
+    return stats
+
+
 # ═══════════════════════════════════════════════
-# BULK OPERATIONS
+# HOT RANKING
 # ═══════════════════════════════════════════════
 
-async def bulk_approve(meme_ids: list, moderator_id: int):
-    """Bulk approve memes."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        for meme_id in meme_ids:
-            await db.execute(
-                """UPDATE memes SET status = 'approved', moderated_by = ?,
-                   moderated_at = CURRENT_TIMESTAMP WHERE id = ?""",
-                (moderator_id, meme_id)
-            )
-        await db.commit()
+HOT_EPOCH = datetime(2024, 1, 1)
 
 
-async def bulk_reject(meme_ids: list, moderator_id: int, reason: str = None):
-    """Bulk reject memes."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        for meme_id in meme_ids:
-            await db.execute(
-                """UPDATE memes SET status = 'rejected', moderated_by = ?,
-                   moderated_at = CURRENT_TIMESTAMP, rejection_reason = ? WHERE id = ?""",
-                (moderator_id, reason, meme_id)
-            )
-        await db.commit()
+def hot_score(likes: int, views: int, shares: int, created_at: str = None) -> float:
+    """
+    Engagement on a log scale plus age: every HOT_DECAY_HOURS a newer meme
+    needs 10x less engagement to rank the same. Scores never go stale with
+    time, so only memes whose counters changed need rescoring.
+    """
+    engagement = (likes or 0) * 2 + (shares or 0) * 3 + (views or 0) / 10
+    try:
+        created = datetime.fromisoformat(created_at) if created_at else datetime.utcnow()
+    except ValueError:
+        created = datetime.utcnow()
+    age = (created.replace(tzinfo=None) - HOT_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / (HOT_DECAY_HOURS * 3600), 7)
+
+
+async def refresh_hot_scores(batch: int = HOT_BATCH) -> int:
+    """Rescore queued memes, `batch` per transaction; returns how many."""
+    def _tx(db):
+        rows = db.execute(
+            """SELECT q.meme_id, m.likes_count, m.views_count, m.shares_count, m.created_at
+               FROM hot_queue q LEFT JOIN memes m ON m.id = q.meme_id
+               LIMIT ?""",
+            (batch,)
+        ).fetchall()
+        db.executemany(
+            "UPDATE memes SET hot_score = ? WHERE id = ?",
+            [(hot_score(r["likes_count"], r["views_count"], r["shares_count"], r["created_at"]),
+              r["meme_id"]) for r in rows if r["created_at"] is not None]
+        )
+        db.executemany("DELETE FROM hot_queue WHERE meme_id = ?", [(r["meme_id"],) for r in rows])
+        return len(rows)
+    
+    total = 0
+    while True:
+        done = await _writer().transaction(_tx)
+        total += done
+        if done < batch:
+            return total
+
 
+# ═══════════════════════════════════════════════
+# RELATED MEMES
+# ═══════════════════════════════════════════════
 
-async def bulk_delete(meme_ids: list):
-    """Bulk delete memes."""
-    for meme_id in meme_ids:
-        await delete_meme(meme_id)
+# Candidates for one meme, scored: +1 per user who liked both (latest
+# RELATED_MAX_LIKERS likers only), +2 same category, +1 same author
+RELATED_CANDIDATES = """
+    WITH target AS (SELECT category_id, author_id FROM memes WHERE id = :id),
+    likers AS (
+        SELECT user_id FROM likes WHERE meme_id = :id ORDER BY id DESC LIMIT :likers
+    ),
+    candidates (related_id, score) AS (
+        SELECT l.meme_id, 1.0 FROM likers JOIN likes l ON l.user_id = likers.user_id
+        UNION ALL
+        SELECT * FROM (
+            SELECT m.id, 2.0 FROM memes m, target t
+            WHERE m.category_id = t.category_id AND m.status = 'approved'
+            ORDER BY m.hot_score DESC LIMIT :limit
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT m.id, 1.0 FROM memes m, target t
+            WHERE m.author_id = t.author_id AND m.status = 'approved'
+            ORDER BY m.hot_score DESC LIMIT :limit
+        )
+    )
+    SELECT c.related_id, SUM(c.score) AS score
+    FROM candidates c JOIN memes m ON m.id = c.related_id
+    WHERE c.related_id != :id AND m.status = 'approved'
+    GROUP BY c.related_id
+    ORDER BY score DESC, MAX(m.hot_score) DESC
+    LIMIT :limit
+"""
+
+
+def _rebuild_related(db, meme_id: int, limit: int):
+    """Replace one meme's neighbour list."""
+    rows = db.execute(
+        RELATED_CANDIDATES, {"id": meme_id, "likers": RELATED_MAX_LIKERS, "limit": limit}
+    ).fetchall()
+    db.execute("DELETE FROM related_memes WHERE meme_id = ?", (meme_id,))
+    db.executemany(
+        "INSERT INTO related_memes (meme_id, rank, related_id, score) VALUES (?, ?, ?, ?)",
+        [(meme_id, rank, row["related_id"], row["score"]) for rank, row in enumerate(rows, 1)]
+    )
+
+
+async def refresh_related(batch: int = RELATED_BATCH, limit: int = RELATED_LIMIT) -> int:
+    """Rebuild neighbour lists of queued memes; returns how many."""
+    def _tx(db):
+        ids = [row[0] for row in db.execute(
+            "SELECT meme_id FROM related_queue LIMIT ?", (batch,)
+        ).fetchall()]
+        for meme_id in ids:
+            _rebuild_related(db, meme_id, limit)
+        db.executemany("DELETE FROM related_queue WHERE meme_id = ?", [(i,) for i in ids])
+        return len(ids)
+    
+    total = 0
+    while True:
+        done = await _writer().transaction(_tx)
+        total += done
+        if done < batch:
+            return total
+
+
+async def get_related_memes(meme_id: int, limit: int = RELATED_LIMIT) -> list:
+    """Precomputed neighbours of a meme, best first."""
+    async with _read() as db:
+        cursor = await db.execute(
+            """SELECT m.id, m.title, m.filename, m.file_type, m.variants, m.content_hash,
+                      m.likes_count, m.views_count
+               FROM related_memes r JOIN memes m ON m.id = r.related_id
+               WHERE r.meme_id = ? AND m.status = 'approved'
+               ORDER BY r.rank LIMIT ?""",
+            (meme_id, limit)
+        )
+        rows = await cursor.fetchall()
+        return _meme_rows([dict(row) for row in rows])
+
+
+# ═══════════════════════════════════════════════
+# BULK OPERATIONS
+# ═══════════════════════════════════════════════
+
+def _chunked(meme_ids: list) -> list[list[int]]:
+    """Distinct ids split into BULK_CHUNK-sized lists."""
+    ids = list(dict.fromkeys(int(i) for i in meme_ids))
+    return [ids[i:i + BULK_CHUNK] for i in range(0, len(ids), BULK_CHUNK)]
+
+
+async def _bulk_update(meme_ids: list, sql: str, params: tuple, outcome: str) -> dict[int, str]:
+    """Run a set-based UPDATE over memes in one transaction; per-id outcomes."""
+    chunks = _chunked(meme_ids)
+    
+    def _tx(db):
+        done = set()
+        for chunk in chunks:
+            rows = db.execute(sql, (*params, json.dumps(chunk))).fetchall()
+            done.update(row["id"] for row in rows)
+        return done
+    
+    done = await _writer().transaction(_tx)
+    _invalidate_counts()
+    return {i: outcome if i in done else "not_found" for chunk in chunks for i in chunk}
+
+
+async def bulk_approve(meme_ids: list, moderator_id: int) -> dict[int, str]:
+    """Bulk approve memes; returns {id: "approved" | "not_found"}."""
+    return await _bulk_update(
+        meme_ids,
+        """UPDATE memes SET status = 'approved', moderated_by = ?,
+           moderated_at = CURRENT_TIMESTAMP
+           WHERE id IN (SELECT value FROM json_each(?)) RETURNING id""",
+        (moderator_id,), "approved"
+    )
+
+
+async def bulk_reject(meme_ids: list, moderator_id: int, reason: str = None) -> dict[int, str]:
+    """Bulk reject memes; returns {id: "rejected" | "not_found"}."""
+    return await _bulk_update(
+        meme_ids,
+        """UPDATE memes SET status = 'rejected', moderated_by = ?,
+           moderated_at = CURRENT_TIMESTAMP, rejection_reason = ?
+           WHERE id IN (SELECT value FROM json_each(?)) RETURNING id""",
+        (moderator_id, reason), "rejected"
+    )
+
+
+async def bulk_delete(meme_ids: list) -> tuple[dict[int, str], list[str]]:
+    """
+    Bulk delete memes with their likes, comments and shares.
+
+    Returns ({id: "deleted" | "not_found"}, filenames of deleted memes);
+    removing the files is left to the caller.
+    """
+    chunks = _chunked(meme_ids)
+    
+    def _tx(db):
+        deleted = {}
+        for chunk in chunks:
+            deleted.update(_delete_memes(db, chunk))
+        return deleted
+    
+    deleted = await _writer().transaction(_tx)
+    _invalidate_counts()
+    outcomes = {i: "deleted" if i in deleted else "not_found" for chunk in chunks for i in chunk}
+    return outcomes, list(deleted.values())
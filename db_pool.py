@@ -0,0 +1,117 @@
+"""
+MemePlatform - SQLite Connection Pool
+Long-lived connections per database file: N readers + 1 writer actor (WAL)
+"""
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiosqlite
+
+from db_writer import SQLiteWriter, get_writer as _get_writer
+from config import (
+    DB_POOL_READERS, DB_STATEMENT_CACHE, DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB, DB_MMAP_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Applied to every pooled connection right after connect
+CONNECTION_PRAGMAS = (
+    f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size = {DB_MMAP_SIZE}",
+)
+
+
+class ConnectionPool:
+    """
+    Read-only aiosqlite connections for one database file.
+
+    Readers are shared round-robin: a connection serializes calls on its
+    own thread, and under WAL readers never block the writer. All writes go
+    through the process-wide writer actor (see db_writer).
+    """
+
+    def __init__(self, path: Path, readers: int = DB_POOL_READERS):
+        self.path = Path(path)
+        self.size = max(1, readers)
+        self._readers: list[aiosqlite.Connection] = []
+        self._open_lock = asyncio.Lock()
+        self._cycle = itertools.cycle(range(self.size))
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._readers)
+
+    async def open(self):
+        """Open readers (idempotent); starts the writer first so WAL is on."""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            get_writer(self.path)
+            self._readers = [await self._connect() for _ in range(self.size)]
+            logger.debug(f"Opened pool for {self.path.name}: {self.size} readers")
+
+    async def close(self):
+        """Close reader connections."""
+        readers, self._readers = self._readers, []
+        for conn in readers:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing connection to {self.path.name}: {e}")
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.path, cached_statements=DB_STATEMENT_CACHE)
+        conn.daemon = True  # Never keep the process alive on exit
+        await conn
+        conn.row_factory = aiosqlite.Row
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute_fetchall(pragma)
+        await conn.execute_fetchall("PRAGMA query_only = 1")
+        return conn
+
+    def reader(self) -> aiosqlite.Connection:
+        """Next read-only connection (round-robin)."""
+        return self._readers[next(self._cycle)]
+
+
+# Reader pools are bound to the event loop that opened them (run.py runs
+# two loops); the writer is shared by all of them
+
+_pools: dict[tuple[asyncio.AbstractEventLoop, str], ConnectionPool] = {}
+
+
+async def get_pool(path: Path) -> ConnectionPool:
+    """Get (and open on first use) the pool for a database file."""
+    key = (asyncio.get_running_loop(), str(path))
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = ConnectionPool(path)
+    if not pool.is_open:
+        await pool.open()
+    return pool
+
+
+@asynccontextmanager
+async def read(path: Path):
+    """Borrow a pooled read-only connection."""
+    pool = await get_pool(path)
+    yield pool.reader()
+
+
+def get_writer(path: Path) -> SQLiteWriter:
+    """Writer actor for a database file (usable from any thread or loop)."""
+    return _get_writer(path, CONNECTION_PRAGMAS)
+
+
+async def close_pools():
+    """Close all pools owned by the running event loop."""
+    loop = asyncio.get_running_loop()
+    for key in [k for k in _pools if k[0] is loop]:
+        await _pools.pop(key).close()
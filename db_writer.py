@@ -0,0 +1,198 @@
+"""
+MemePlatform - SQLite Write Serializer
+One writer thread per database file; writes from any thread or event loop
+are queued, grouped into transactions and resolved through futures.
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from config import DB_STATEMENT_CACHE, DB_WRITE_BATCH
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class WriteResult:
+    """Outcome of a single queued statement."""
+    lastrowid: int | None = None
+    rowcount: int = 0
+    rows: list = field(default_factory=list)  # Filled for RETURNING statements
+
+
+class SQLiteWriter(threading.Thread):
+    """
+    Actor owning the only write connection to a database file.
+
+    Jobs are plain functions taking a sqlite3 connection. Everything queued
+    while a transaction runs is committed together in the next one; each job
+    runs inside its own savepoint so a failing job doesn't take its batch down.
+    Futures resolve only after COMMIT, so callers can read their writes back.
+    """
+
+    def __init__(self, path: Path, pragmas: tuple = (), batch_size: int = DB_WRITE_BATCH):
+        super().__init__(name=f"sqlite-writer-{Path(path).name}", daemon=True)
+        self.path = Path(path)
+        self.pragmas = pragmas
+        self.batch_size = max(1, batch_size)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._ready = threading.Event()
+        self._stopped = False
+        self.error: Exception | None = None
+
+    # === Public API (any thread) ===
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue a job; returns a concurrent future with its result."""
+        if self._stopped:
+            raise RuntimeError(f"Writer for {self.path.name} is stopped")
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    async def transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run a multi-statement job atomically and await its result."""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    async def execute(self, sql: str, params: tuple | list = ()) -> WriteResult:
+        """Run one write statement."""
+        def _job(db: sqlite3.Connection) -> WriteResult:
+            cursor = db.execute(sql, params)
+            rows = cursor.fetchall()
+            return WriteResult(cursor.lastrowid, cursor.rowcount, rows)
+        return await self.transaction(_job)
+
+    async def executemany(self, sql: str, seq_of_params) -> WriteResult:
+        """Run one write statement for many parameter sets."""
+        def _job(db: sqlite3.Connection) -> WriteResult:
+            cursor = db.executemany(sql, seq_of_params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return await self.transaction(_job)
+
+    def stop(self, timeout: float = 10):
+        """Finish queued writes and close the connection."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        if self.is_alive():
+            self.join(timeout)
+
+    # === Writer thread ===
+
+    def run(self):
+        try:
+            db = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False,
+                cached_statements=DB_STATEMENT_CACHE
+            )
+            db.row_factory = sqlite3.Row
+            for pragma in self.pragmas:
+                db.execute(pragma).fetchall()
+            db.execute("PRAGMA journal_mode = WAL").fetchall()
+        except Exception as e:
+            self.error = e
+            self._stopped = True
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._run_batch(db, batch)
+                if stop:
+                    break
+        finally:
+            db.close()
+
+    def _next_batch(self) -> tuple[list, bool]:
+        """Block for one job, then take whatever else is already queued."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run_batch(self, db: sqlite3.Connection, batch: list):
+        outcomes = []
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                db.execute("SAVEPOINT job")
+                try:
+                    result = fn(db)
+                except BaseException as e:
+                    db.execute("ROLLBACK TO job")
+                    db.execute("RELEASE job")
+                    outcomes.append((future, None, e))
+                else:
+                    db.execute("RELEASE job")
+                    outcomes.append((future, result, None))
+            db.execute("COMMIT")
+        except Exception as e:
+            logger.exception(f"Write batch on {self.path.name} failed: {e}")
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            for _, future in batch:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_writers: dict[str, SQLiteWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path: Path, pragmas: tuple = ()) -> SQLiteWriter:
+    """Get (and start on first use) the process-wide writer for a database file."""
+    key = str(Path(path).resolve())
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                writer = SQLiteWriter(path, pragmas)
+                writer.start()
+                writer._ready.wait()
+                if writer.error:
+                    raise writer.error
+                _writers[key] = writer
+    return writer
+
+
+@atexit.register
+def stop_writers():
+    """Flush and stop every writer (also runs at interpreter exit)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
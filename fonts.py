@@ -0,0 +1,104 @@
+"""
+MemeMakerBot - Font Registry
+Font files are looked up once per process; loaded FreeTypeFont objects are
+kept in a bounded LRU keyed by (path, size) so text fitting never re-parses a TTF
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import ImageFont
+
+from config import FONT_PATHS, FONT_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Style -> candidate files, best first; the first one present wins and the
+# rest are fallbacks if it fails to load
+FONT_CHAINS = {
+    "bold": FONT_PATHS,
+}
+
+
+class FontRegistry:
+    """
+    Discovered font files plus an LRU of loaded fonts.
+
+    Thread-safe: the bot renders on worker threads.
+    """
+
+    def __init__(self, chains: dict[str, list[str]] = FONT_CHAINS, size: int = FONT_CACHE_SIZE):
+        self.size = size
+        self._candidates = chains
+        self._chains: dict[str, list[str]] | None = None
+        self._fonts: OrderedDict[tuple[str, int], ImageFont.FreeTypeFont] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def discover(self) -> dict[str, list[str]]:
+        """Stat the candidate files (once); returns style -> available paths."""
+        if self._chains is None:
+            chains = {
+                style: [path for path in paths if Path(path).is_file()]
+                for style, paths in self._candidates.items()
+            }
+            for style, paths in chains.items():
+                if paths:
+                    logger.info(f"Font '{style}': {paths[0]} ({len(paths) - 1} fallbacks)")
+                else:
+                    logger.warning(f"No font found for '{style}', using Pillow's default")
+            self._chains = chains
+        return self._chains
+
+    def path(self, style: str = "bold") -> str | None:
+        """Best available file for a style."""
+        chain = self.discover().get(style)
+        return chain[0] if chain else None
+
+    def get(self, size: int, style: str = "bold") -> ImageFont.FreeTypeFont:
+        """Font of a style at a pixel size, walking the fallback chain on load errors."""
+        for path in list(self.discover().get(style, [])):
+            font = self.load(path, size)
+            if font is not None:
+                return font
+            with self._lock:
+                if path in self._chains[style]:
+                    self._chains[style].remove(path)  # Broken file: stop trying it
+        return ImageFont.load_default()
+
+    def load(self, path: str, size: int) -> ImageFont.FreeTypeFont | None:
+        """Cached ImageFont.truetype(path, size); None if the file can't be loaded."""
+        key = (path, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+        try:
+            font = ImageFont.truetype(path, size=size)
+        except OSError as e:
+            logger.warning(f"Could not load font {path}: {e}")
+            return None
+        with self._lock:
+            self._fonts[key] = font
+            while len(self._fonts) > self.size:
+                self._fonts.popitem(last=False)
+        return font
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "fonts": {style: list(paths) for style, paths in (self._chains or {}).items()},
+            "entries": len(self._fonts),
+            "max_entries": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+fonts = FontRegistry()
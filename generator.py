@@ -2,12 +2,19 @@
 MemeMakerBot - Meme Generator (Pillow)
 8-position text placement
 """
+import logging
+import unicodedata
 import uuid
+from weakref import WeakKeyDictionary
 from pathlib import Path
 from dataclasses import dataclass
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw, ImageFont
 
-from config import GENERATED_DIR, FONT_PATHS
+from config import GENERATED_DIR
+from fonts import fonts
+from template_cache import templates
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -39,42 +46,46 @@ POSITIONS = {
 
 
 def find_font() -> str | None:
-    """Find available font with Cyrillic support."""
-    for path in FONT_PATHS:
-        if Path(path).exists():
-            return path
-    return None
+    """Available font with Cyrillic support (discovered once per process)."""
+    return fonts.path("bold")
 
 
-def generate_meme(template_path: Path, text_blocks: list[TextBlock]) -> Path:
+def generate_meme(
+    template_path: Path,
+    text_blocks: list[TextBlock],
+    max_side: int | None = None
+) -> Path:
     """
     Generate meme with multiple text blocks at 8 positions.
     
     Args:
         template_path: Path to template image
         text_blocks: List of TextBlock with text, position, font_size
+        max_side: Longest side of the output (larger templates are scaled
+            down while decoding); None for the template's own size
     """
     GENERATED_DIR.mkdir(parents=True, exist_ok=True)
     
-    with Image.open(template_path) as img:
-        img = img.convert("RGB")
-        draw = ImageDraw.Draw(img)
-        w, h = img.size
-        
-        font_path = find_font()
-        
-        for block in text_blocks:
-            if not block.text.strip():
-                continue
-            
-            _draw_text_at_position(
-                draw, block.text.upper(), font_path,
-                w, h, block.position, block.font_size
-            )
+    img = templates.get(template_path, max_side)
+    draw = ImageDraw.Draw(img)
+    w, h = img.size
+    
+    font_path = find_font()
+    
+    for block in text_blocks:
+        if not block.text.strip():
+            continue
         
-        out_path = GENERATED_DIR / f"meme_{uuid.uuid4().hex[:12]}.jpg"
-        img.save(out_path, format="JPEG", quality=92, optimize=True)
-        return out_path
+        _draw_text_at_position(
+            draw, block.text.upper(), font_path,
+            w, h, block.position, block.font_size
+        )
+    
+    out_path = GENERATED_DIR / f"meme_{uuid.uuid4().hex[:12]}.jpg"
+    img.save(out_path, format="JPEG", quality=92, optimize=True)
+    if logger.isEnabledFor(logging.DEBUG):  # stats() walks both caches
+        logger.debug(f"Font cache: {fonts.stats()}, template cache: {templates.stats()}")
+    return out_path
 
 
 def _draw_text_at_position(
@@ -109,37 +120,10 @@ def _draw_text_at_position(
     margin = int(img_width * 0.05)
     max_width = int(img_width * 0.45)  # Max 45% of image width per text
     
-    # Find fitting font size
-    font_size = base_size
-    min_size = 14
-    
-    while font_size >= min_size:
-        font = _load_font(font_path, font_size)
-        lines = _wrap_text(draw, text, font, max_width)
-        
-        # Calculate total height
-        total_height = 0
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            total_height += bbox[3] - bbox[1] + int(font_size * 0.15)
-        
-        if total_height <= img_height * 0.35:
-            break
-        font_size -= 2
-    
-    font = _load_font(font_path, max(font_size, min_size))
+    layout = fit_text(text, font_path, max_width, img_height * 0.35, base_size)
+    font, font_size, lines, line_heights = layout.font, layout.font_size, layout.lines, layout.line_heights
     stroke_width = max(2, int(font_size * 0.08))
-    
-    lines = _wrap_text(draw, text, font, max_width)
-    
-    # Calculate line heights
-    line_heights = []
-    total_height = 0
-    for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=font)
-        h = bbox[3] - bbox[1]
-        line_heights.append(h)
-        total_height += h
+    total_height = sum(line_heights)
     
     line_spacing = int(font_size * 0.12)
     total_height += line_spacing * (len(lines) - 1)
@@ -184,34 +168,164 @@ def _draw_text_at_position(
 
 
 def _load_font(font_path: str | None, size: int) -> ImageFont.FreeTypeFont:
-    """Load font with fallback."""
+    """Cached font with fallback."""
     if font_path:
-        try:
-            return ImageFont.truetype(font_path, size=size)
-        except Exception:
-            pass
-    return ImageFont.load_default()
+        font = fonts.load(font_path, size)
+        if font is not None:
+            return font
+    return fonts.get(size)
+
+
+# ═══════════════════════════════════════════════
+# TEXT LAYOUT
+# ═══════════════════════════════════════════════
+
+MIN_FONT_SIZE = 14
+FONT_SIZE_STEP = 2
+WORD_CACHE_SIZE = 4096  # Per font object
 
+# Font object -> {word: (advance, left, top, right, bottom)}; entries go away
+# with the font when the registry evicts it
+_word_metrics: WeakKeyDictionary = WeakKeyDictionary()
+
+
+@dataclass
+class TextLayout:
+    """A caption wrapped at a font size."""
+    font: ImageFont.FreeTypeFont
+    font_size: int
+    lines: list[str]
+    line_heights: list[int]
 
-def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
-    """Wrap text to fit within max_width."""
-    words = text.split()
+
+def fit_text(
+    text: str,
+    font_path: str | None,
+    max_width: int,
+    max_height: float,
+    base_size: int
+) -> TextLayout:
+    """
+    Largest size out of base_size, base_size - 2, ... 14 whose wrapped lines
+    (each plus 15% of the size) fit in max_height; binary search, since a
+    smaller size never needs more room.
+
+    When nothing fits, the 14px font is used with the spacing and stroke of
+    the step below the last one, as the linear search always did.
+    """
+    sizes = list(range(base_size, MIN_FONT_SIZE - 1, -FONT_SIZE_STEP))
+    layouts = {}
+    
+    def fits(size: int) -> bool:
+        layout = layouts[size] = _layout(text, _load_font(font_path, size), size, max_width)
+        return sum(h + int(size * 0.15) for h in layout.line_heights) <= max_height
+    
+    # First index that fits, given everything after a fitting size fits too
+    lo, hi = 0, len(sizes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(sizes[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    
+    if lo < len(sizes):
+        return layouts[sizes[lo]]
+    font_size = sizes[-1] - FONT_SIZE_STEP
+    return _layout(text, _load_font(font_path, MIN_FONT_SIZE), font_size, max_width)
+
+
+def _layout(text: str, font: ImageFont.FreeTypeFont, font_size: int, max_width: int) -> TextLayout:
+    lines = _wrap_text(text, font, max_width)
+    return TextLayout(font, font_size, lines, [_line_height(font, line) for line in lines])
+
+
+def _metrics(font: ImageFont.FreeTypeFont, word: str) -> tuple[float, int, int, int, int]:
+    """(advance, *ink bbox) of a word, measured once per font object."""
+    cache = _word_metrics.get(font)
+    if cache is None:
+        cache = _word_metrics[font] = {}
+    metrics = cache.get(word)
+    if metrics is None:
+        if len(cache) >= WORD_CACHE_SIZE:
+            cache.clear()
+        metrics = cache[word] = (font.getlength(word), *font.getbbox(word))
+    return metrics
+
+
+def _line_height(font: ImageFont.FreeTypeFont, line: str) -> int:
+    """Ink height of a line: spaces have no ink, so it spans its words' boxes."""
+    boxes = [_metrics(font, word) for word in line.split(" ")]
+    return max(box[4] for box in boxes) - min(box[2] for box in boxes)
+
+
+def _fits_width(font: ImageFont.FreeTypeFont, words: list[str], estimate: float, max_width: int) -> bool:
+    """
+    Whether the words joined by spaces are at most max_width wide in ink.
+
+    The estimate from summed advances is off by up to a pixel (rounding of
+    the ink edges), so only text within two pixels of the limit is measured
+    for real.
+    """
+    if estimate <= max_width - 2:
+        return True
+    if estimate > max_width + 2:
+        return False
+    bbox = font.getbbox(" ".join(words))
+    return bbox[2] - bbox[0] <= max_width
+
+
+def _break_word(font: ImageFont.FreeTypeFont, word: str, max_width: int) -> list[str]:
+    """Split a word wider than max_width into pieces that fit (at least one character each)."""
+    pieces = []
+    start = 0
+    pen = left = 0.0  # Advance of word[start:i]; its ink left
+    for i, char in enumerate(word):
+        advance, char_left, _, right, _ = _metrics(font, char)
+        # Combining marks stay with the letter before them
+        if i > start and not unicodedata.combining(char):
+            if not _fits_width(font, [word[start:i + 1]], pen + right - left, max_width):
+                pieces.append(word[start:i])
+                start, pen = i, 0.0
+        if i == start:
+            left = char_left
+        pen += advance
+    pieces.append(word[start:])
+    return pieces
+
+
+def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
+    """
+    Wrap text to fit within max_width, breaking words that are wider on
+    their own at character boundaries.
+
+    Each word is measured once per font and line widths are accumulated, so
+    this is linear in the length of the text.
+    """
+    space = _metrics(font, " ")[0]
     lines = []
     current_line = []
+    pen = left = 0.0  # Advance up to the end of current_line; first word's ink left
     
-    for word in words:
-        test_line = " ".join(current_line + [word])
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        
-        if bbox[2] - bbox[0] <= max_width:
-            current_line.append(word)
-        else:
+    for word in text.split():
+        advance, word_left, _, right, _ = _metrics(font, word)
+        if right - word_left > max_width:
             if current_line:
                 lines.append(" ".join(current_line))
-            current_line = [word]
+            *pieces, word = _break_word(font, word, max_width)
+            lines.extend(pieces)
+            advance, word_left, _, right, _ = _metrics(font, word)
+        elif current_line:
+            test_line = current_line + [word]
+            if _fits_width(font, test_line, pen + space + right - left, max_width):
+                current_line = test_line
+                pen += space + advance
+                continue
+            lines.append(" ".join(current_line))
+        current_line = [word]
+        pen, left = advance, word_left
     
     if current_line:
         lines.append(" ".join(current_line))
     
     return lines or [""]
-
@@ -25,6 +25,7 @@ from keyboards import (
     moderation_kb
 )
 from locales import get_text, detect_language
+from render_pool import render_pool
 from states import AdminStates
 
 logger = logging.getLogger(__name__)
@@ -138,9 +139,26 @@ async def cb_admin_stats(callback: CallbackQuery, state: FSMContext):
     memes = await get_memes_count()
     errors = await get_errors_count()
     templates = await get_templates_count()
+    text = get_text("admin_stats", lang, users=users, memes=memes, templates=templates, errors=errors)
+    
+    # Cache counters live in each render worker; one of them answers for itself
+    try:
+        caches = await render_pool.worker_stats()
+        text += get_text(
+            "admin_render_stats", lang,
+            pid=caches["pid"],
+            workers=render_pool.workers,
+            templates=caches["templates"]["entries"],
+            mb=caches["templates"]["bytes"] // (1024 * 1024),
+            template_hits=round(caches["templates"]["hit_rate"] * 100),
+            font_hits=round(caches["fonts"]["hit_rate"] * 100),
+            rejected=render_pool.rejected
+        )
+    except Exception as e:
+        logger.warning(f"Could not get render stats: {e}")
     
     await callback.message.edit_text(
-        get_text("admin_stats", lang, users=users, memes=memes, templates=templates, errors=errors),
+        text,
         reply_markup=back_to_admin_kb(lang),
         parse_mode="HTML"
     )
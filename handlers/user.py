@@ -2,6 +2,7 @@
 MemeMakerBot - User Handlers
 8-position text placement flow
 """
+import html
 import logging
 import json
 import base64
@@ -13,19 +14,21 @@ from aiogram.types import Message, CallbackQuery, FSInputFile, InputSticker
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from config import MAX_TEXT_LENGTH, TEMPLATES_DIR, UPLOADS_DIR, MAX_UPLOADS_PER_DAY, MIN_IMAGE_SIZE
+from config import MAX_TEXT_LENGTH, TEMPLATES_DIR, UPLOADS_DIR, MAX_UPLOADS_PER_DAY, MIN_IMAGE_SIZE, WEB_URL
 from database import (
     get_active_templates, get_template_by_id, 
     increment_template_usage, save_meme,
     get_user_uploads_today, increment_user_uploads, add_user_template
 )
-from generator import generate_meme, TextBlock
+import database_new as db_new
+from generator import TextBlock
 from keyboards import (
     main_menu_kb, template_carousel_kb, text_input_kb, 
     result_kb, cancel_kb, upload_name_kb, font_size_kb,
     position_kb, add_more_text_kb
 )
 from locales import get_text, detect_language
+from render_pool import render_pool, RenderBusy
 from states import MemeCreation, MemeUpload
 
 logger = logging.getLogger(__name__)
@@ -190,6 +193,34 @@ async def cmd_create(message: Message, state: FSMContext):
     await show_template_carousel(message, state, lang, index=0)
 
 
+@router.message(Command("hot"))
+async def cmd_hot(message: Message, state: FSMContext):
+    await state.clear()
+    lang = detect_language(message.from_user.language_code)
+    await message.answer(
+        await hot_memes_text(lang),
+        reply_markup=main_menu_kb(lang),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
+async def hot_memes_text(lang: str, limit: int = 10) -> str:
+    """Top of the platform's "hot" ranking with links to the site."""
+    memes = await db_new.get_hot_memes(limit)
+    if not memes:
+        return get_text("hot_empty", lang)
+    lines = [get_text("hot_title", lang)]
+    untitled = get_text("hot_untitled", lang)
+    for i, meme in enumerate(memes, 1):
+        title = html.escape(meme.get("title") or untitled)
+        lines.append(
+            f'{i}. <a href="{WEB_URL}/meme/{meme["id"]}">{title}</a> '
+            f'❤️ {meme.get("likes_count") or 0} 👁 {meme.get("views_count") or 0}'
+        )
+    return "\n".join(lines)
+
+
 # ═══════════════════════════════════════════════
 # MAIN MENU
 # ═══════════════════════════════════════════════
@@ -226,6 +257,19 @@ async def cb_help(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+@router.callback_query(F.data == "hot_memes")
+async def cb_hot_memes(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    lang = detect_language(callback.from_user.language_code)
+    await callback.message.answer(
+        await hot_memes_text(lang),
+        reply_markup=main_menu_kb(lang),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+    await callback.answer()
+
+
 @router.callback_query(F.data == "open_web")
 async def cb_open_web(callback: CallbackQuery):
     """Send web platform info."""
@@ -754,7 +798,7 @@ async def generate_and_send(message: Message, state: FSMContext, user):
             for tb in text_blocks_data
         ]
         
-        meme_path = generate_meme(template_path, text_blocks)
+        meme_path = await render_pool.render(template_path, text_blocks)
         
         all_text = " | ".join(tb["text"] for tb in text_blocks_data)
         await save_meme(user.id, template_id, all_text, "")
@@ -774,6 +818,20 @@ async def generate_and_send(message: Message, state: FSMContext, user):
         
         logger.info(f"Meme generated for user {user.id} with {len(text_blocks)} text blocks")
         
+    except RenderBusy:
+        try:
+            await status_msg.delete()
+        except Exception:
+            pass
+        
+        # Keep the text blocks: the user can press "generate" again
+        await message.answer(
+            get_text("error_busy", lang),
+            reply_markup=add_more_text_kb(lang),
+            parse_mode="HTML"
+        )
+        return
+        
     except Exception as e:
         logger.exception(f"Error generating meme: {e}")
         try:
@@ -0,0 +1,135 @@
+"""
+MemePlatform - Resized Image Cache
+On-demand resizes live on disk under a byte budget; an in-memory LRU index
+decides what to evict, and concurrent misses for one key share one render.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from config import DATA_DIR, IMG_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = DATA_DIR / "cache" / "img"
+
+# Writes the image to the given path (atomically)
+Renderer = Callable[[Path], Awaitable[None]]
+
+
+class ImageCache:
+    """
+    Size-bounded directory of rendered images.
+
+    The index (name -> bytes, least recently used first) is rebuilt from
+    file mtimes on startup and kept in memory afterwards. Meant for a single
+    event loop.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = IMG_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0  # Misses that waited for a render already in flight
+        self._load()
+
+    def _load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)  # Left over by an interrupted render
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._index[name] = size
+            self._bytes += size
+        self._evict()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def get(self, name: str, render: Renderer) -> Path:
+        """Path of a cached image, rendering it first on a miss."""
+        path = self.directory / name
+        if name in self._index:
+            if path.exists():
+                self._index.move_to_end(name)
+                self.hits += 1
+                return path
+            self._drop(name)
+        task = self._inflight.get(name)
+        if task is not None:
+            self.joined += 1
+        else:
+            self.misses += 1
+            task = self._inflight[name] = asyncio.ensure_future(self._fill(name, render))
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        # Shielded so one client going away does not cancel the others' render
+        return await asyncio.shield(task)
+
+    async def _fill(self, name: str, render: Renderer) -> Path:
+        path = self.directory / name
+        await render(path)
+        size = path.stat().st_size
+        self._index[name] = size
+        self._bytes += size
+        self._evict()
+        return path
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._unlink(name)
+
+    def _drop(self, name: str):
+        self._bytes -= self._index.pop(name, 0)
+
+    def _unlink(self, name: str):
+        try:
+            (self.directory / name).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not evict {name}: {e}")
+
+    def forget(self, prefix: str) -> int:
+        """Remove every entry whose name starts with prefix (e.g. a deleted meme's)."""
+        names = [name for name in self._index if name.startswith(prefix)]
+        for name in names:
+            self._drop(name)
+            self._unlink(name)
+        return len(names)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "joined": self.joined,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+_cache: ImageCache | None = None
+
+
+def get_image_cache() -> ImageCache:
+    """Process-wide resize cache (index loaded on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
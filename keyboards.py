@@ -34,6 +34,12 @@ def main_menu_kb(lang: str = "ru") -> InlineKeyboardMarkup:
             web_app=WebAppInfo(url=f"{WEB_URL}/miniapp")
         )
     )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text("btn_hot", lang),
+            callback_data="hot_memes"
+        )
+    )
     builder.row(
         InlineKeyboardButton(
             text=get_text("btn_help", lang),
@@ -11,8 +11,8 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "en": "👋 <b>Hello!</b>\n\nI create memes. Pick a template and add your text.\n\n➡️ Press the button below to start.",
     },
     "help": {
-        "ru": "📖 <b>Как пользоваться:</b>\n\n1️⃣ Выбери шаблон\n2️⃣ Введи текст (верх/низ)\n3️⃣ Получи мем!\n\n<b>Команды:</b>\n/start — начать\n/create — создать мем\n/help — справка",
-        "en": "📖 <b>How to use:</b>\n\n1️⃣ Pick a template\n2️⃣ Enter text (top/bottom)\n3️⃣ Get your meme!\n\n<b>Commands:</b>\n/start — start\n/create — create meme\n/help — help",
+        "ru": "📖 <b>Как пользоваться:</b>\n\n1️⃣ Выбери шаблон\n2️⃣ Введи текст (верх/низ)\n3️⃣ Получи мем!\n\n<b>Команды:</b>\n/start — начать\n/create — создать мем\n/hot — горячие мемы\n/help — справка",
+        "en": "📖 <b>How to use:</b>\n\n1️⃣ Pick a template\n2️⃣ Enter text (top/bottom)\n3️⃣ Get your meme!\n\n<b>Commands:</b>\n/start — start\n/create — create meme\n/hot — hot memes\n/help — help",
     },
     
     # === Buttons ===
@@ -24,6 +24,10 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "ru": "❓ Помощь",
         "en": "❓ Help",
     },
+    "btn_hot": {
+        "ru": "🔥 Горячие мемы",
+        "en": "🔥 Hot memes",
+    },
     "btn_back": {
         "ru": "◀️ Назад",
         "en": "◀️ Back",
@@ -168,6 +172,10 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "ru": "❌ Произошла ошибка. Попробуй ещё раз.",
         "en": "❌ An error occurred. Please try again.",
     },
+    "error_busy": {
+        "ru": "🔥 Генератор сейчас занят. Попробуй ещё раз через пару секунд.",
+        "en": "🔥 The generator is busy right now. Please try again in a few seconds.",
+    },
     "error_rate_limit": {
         "ru": "⏰ Слишком много запросов. Подожди немного.",
         "en": "⏰ Too many requests. Please wait a moment.",
@@ -198,6 +206,10 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "ru": "📊 <b>Статистика</b>\n\n👤 Пользователей: <b>{users}</b>\n🖼 Мемов создано: <b>{memes}</b>\n📁 Шаблонов: <b>{templates}</b>\n❌ Ошибок: <b>{errors}</b>",
         "en": "📊 <b>Statistics</b>\n\n👤 Users: <b>{users}</b>\n🖼 Memes created: <b>{memes}</b>\n📁 Templates: <b>{templates}</b>\n❌ Errors: <b>{errors}</b>",
     },
+    "admin_render_stats": {
+        "ru": "\n\n🎨 <b>Рендер</b>\nКеш воркера {pid} (один из {workers}):\nШаблонов: <b>{templates}</b> ({mb} МБ)\nПопаданий: шаблоны <b>{template_hits}%</b>, шрифты <b>{font_hits}%</b>\nОтказов «занято»: <b>{rejected}</b>",
+        "en": "\n\n🎨 <b>Rendering</b>\nCache of worker {pid} (one of {workers}):\nTemplates: <b>{templates}</b> ({mb} MB)\nHit rate: templates <b>{template_hits}%</b>, fonts <b>{font_hits}%</b>\nBusy rejections: <b>{rejected}</b>",
+    },
     "admin_templates": {
         "ru": "🖼 <b>Управление шаблонами</b>\n\nВсего: <b>{count}</b>\n\n✅ = активен | ❌ = скрыт",
         "en": "🖼 <b>Manage Templates</b>\n\nTotal: <b>{count}</b>\n\n✅ = active | ❌ = hidden",
@@ -277,6 +289,20 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "en": "◀️ Back to admin",
     },
     
+    # === Hot Memes ===
+    "hot_title": {
+        "ru": "🔥 <b>Горячие мемы</b>\n",
+        "en": "🔥 <b>Hot memes</b>\n",
+    },
+    "hot_untitled": {
+        "ru": "Мем",
+        "en": "Meme",
+    },
+    "hot_empty": {
+        "ru": "🤷 Пока нет горячих мемов. Загляни позже!",
+        "en": "🤷 No hot memes yet. Check back later!",
+    },
+    
     # === User Upload to Catalog ===
     "btn_add_to_catalog": {
         "ru": "➕ Добавить мем в каталог",
@@ -12,6 +12,7 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from config import BOT_TOKEN, LOG_LEVEL
 from database import init_db
 import database_new as db_new
+from render_pool import render_pool
 from handlers import user_router, admin_router
 from middlewares import RateLimitMiddleware, UserTrackingMiddleware, ErrorLoggingMiddleware
 
@@ -34,6 +35,9 @@ async def main():
     await db_new.init_db()
     logger.info("Databases initialized")
     
+    # Meme rendering runs in worker processes (they look up fonts once each)
+    await render_pool.start()
+    
     # Create bot and dispatcher
     bot = Bot(
         token=BOT_TOKEN,
@@ -56,7 +60,11 @@ async def main():
     logger.info("Bot is ready!")
     
     # Start polling
-    await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+    try:
+        await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+    finally:
+        render_pool.shutdown()
+        await db_new.close_db()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+"""
+MemePlatform - Media Serving
+Uploaded files with size/mtime ETags, conditional requests, single byte
+ranges and zero-copy sends when the server (or a fronting nginx) can do them
+"""
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from stat import S_ISREG
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from config import MEDIA_ACCEL_PREFIX
+
+CHUNK_SIZE = 256 * 1024
+
+# Versioned URLs (?v=...) never change; plain ones are revalidated daily
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=86400"
+
+MEDIA_TYPES = {
+    ".webp": "image/webp",
+    ".webm": "video/webm",
+    ".mp4": "video/mp4",
+}
+
+
+def media_type(path: Path) -> str:
+    return MEDIA_TYPES.get(path.suffix.lower()) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+# ═══════════════════════════════════════════════
+# URLS
+# ═══════════════════════════════════════════════
+
+def versioned(url: str, meme: dict) -> str:
+    """Append the meme's content version so the URL can be cached forever."""
+    content_hash = meme.get("content_hash")
+    return f"{url}?v={content_hash[:12]}" if content_hash else url
+
+
+def media_url(meme: dict) -> str:
+    """URL of a meme's original file."""
+    return versioned(f"/data/uploads/{meme['filename']}", meme)
+
+
+# ═══════════════════════════════════════════════
+# ETAGS
+# ═══════════════════════════════════════════════
+
+def file_etag(stat: os.stat_result) -> str:
+    """
+    Strong ETag from size and mtime (as nginx does), so no request reads the file.
+
+    Uploads are written to a temp file and renamed into place, and variants
+    are rewritten whole, so a changed file always gets a new mtime.
+    """
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+# ═══════════════════════════════════════════════
+# CONDITIONAL REQUESTS AND RANGES
+# ═══════════════════════════════════════════════
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _if_range_matches(header: str, etag: str, last_modified: str) -> bool:
+    """
+    If-Range comparison, which RFC 9110 requires to be strong: a weak ETag
+    never matches, so the client gets the whole file instead of a range.
+    """
+    header = header.strip()
+    if header.startswith("W/"):
+        return False
+    if header.startswith('"'):
+        return header == etag
+    return header == last_modified
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return _etag_matches(inm, etag)
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    One `bytes=` range as inclusive (start, end); None to send the whole file.
+
+    Multi-range requests are answered with the whole file, which RFC 9110
+    permits and players never send.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+# ═══════════════════════════════════════════════
+# RESPONSES
+# ═══════════════════════════════════════════════
+
+class FileRangeResponse(Response):
+    """
+    Body is bytes [start, end] of a file.
+
+    Uses the ASGI zero-copy extension when the server offers it, otherwise
+    streams CHUNK_SIZE reads done on the threadpool.
+    """
+
+    def __init__(self, path: Path, start: int, end: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.headers["content-length"] = str(self.length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.length,
+                })
+            return
+        # Open, seek and the first read share one threadpool hop: most images fit in it
+        f, chunk = await run_in_threadpool(self._open_at, min(CHUNK_SIZE, self.length))
+        try:
+            left = self.length - len(chunk)
+            while chunk and left > 0:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await run_in_threadpool(f.read, min(CHUNK_SIZE, left))
+                left -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": False})
+        finally:
+            f.close()
+
+    def _open_at(self, size: int):
+        f = open(self.path, "rb")
+        f.seek(self.start)
+        return f, f.read(size)
+
+
+async def serve_file(request: Request, root: Path, relative: str) -> Response:
+    """Serve root/relative with caching headers, 304s and byte ranges."""
+    # No way out of root ('..') and no hidden files (temp uploads start with '.')
+    parts = relative.split("/")
+    if any(not part or part.startswith(".") or "\\" in part for part in parts):
+        return Response(status_code=404)
+    path = root.joinpath(*parts)
+    try:
+        stat = path.stat()  # Cheaper inline than a threadpool hop
+    except (FileNotFoundError, NotADirectoryError):
+        return Response(status_code=404)
+    if not S_ISREG(stat.st_mode):
+        return Response(status_code=404)
+
+    etag = file_etag(stat)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "cache-control": IMMUTABLE if request.query_params.get("v") else REVALIDATE,
+        "accept-ranges": "bytes",
+    }
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if MEDIA_ACCEL_PREFIX:
+        # nginx serves the bytes (sendfile, ranges) from an internal location
+        headers["x-accel-redirect"] = f"{MEDIA_ACCEL_PREFIX.rstrip('/')}/{relative}"
+        return Response(headers=headers, media_type=media_type(path))
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and size:
+        if_range = request.headers.get("if-range")
+        if if_range is None or _if_range_matches(if_range, etag, headers["last-modified"]):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size - 1, 200, headers, media_type(path))
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end, 206, headers, media_type(path))
@@ -0,0 +1,73 @@
+"""
+MemePlatform - Schema Migrations
+Ordered, versioned schema steps tracked in a schema_version table
+"""
+import logging
+import sqlite3
+from typing import Callable, Union
+
+logger = logging.getLogger(__name__)
+
+# A step is either an SQL script or a function taking the connection
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def run_script(db: sqlite3.Connection, script: str):
+    """
+    Execute a multi-statement script inside the current transaction.
+
+    Unlike executescript() this never issues an implicit COMMIT, and it
+    keeps trigger bodies (BEGIN ... ; ... END) together.
+    """
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \n\t;"):
+                db.execute(statement)
+            statement = ""
+
+
+def current_version(db: sqlite3.Connection) -> int:
+    """Latest applied migration (0 for a database that predates migrations)."""
+    try:
+        row = db.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return 0
+    return row[0] or 0
+
+
+def migrate(db: sqlite3.Connection, migrations: list[tuple[str, Step]]) -> int:
+    """
+    Apply pending migrations in order and return the resulting version.
+
+    Version N is migrations[N - 1]. Runs inside the caller's transaction, so
+    a failing step leaves the schema and schema_version untouched.
+    """
+    version = current_version(db)
+    if version >= len(migrations):
+        return version
+
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    for number, (name, step) in enumerate(migrations[version:], start=version + 1):
+        if callable(step):
+            step(db)
+        else:
+            run_script(db, step)
+        db.execute(
+            "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+            (number, name)
+        )
+        logger.info(f"Applied migration {number}: {name}")
+        version = number
+
+    return version
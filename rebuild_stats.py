@@ -0,0 +1,22 @@
+"""
+Recompute materialized platform statistics from the base tables
+Usage: python rebuild_stats.py
+"""
+import asyncio
+
+from database_new import init_db, rebuild_stats, get_stats, close_db
+
+
+async def main():
+    await init_db()
+    await rebuild_stats()
+    stats = await get_stats()
+    await close_db()
+    
+    print("✅ Статистика пересчитана")
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+"""
+MemeMakerBot - Render Pool
+generate_meme() runs in worker processes so a big template never blocks the
+event loop: a bounded number of jobs waits, each has a time limit, and
+workers can be replaced after RENDER_MAX_TASKS jobs
+"""
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from config import RENDER_WORKERS, RENDER_QUEUE, RENDER_TIMEOUT, RENDER_MAX_TASKS, MEME_MAX_SIDE
+from fonts import fonts
+from generator import generate_meme, TextBlock
+from template_cache import templates
+
+logger = logging.getLogger(__name__)
+
+
+class RenderBusy(Exception):
+    """Every worker is busy and the queue is full; the caller should retry later."""
+
+
+class RenderTimeout(Exception):
+    """A job ran longer than its time limit."""
+
+
+def _warm_up() -> str | None:
+    """Runs in a fresh worker: loads the generator and looks up its fonts."""
+    return fonts.path()
+
+
+def _worker_stats() -> dict:
+    """Runs in a worker: its pid and cache counters."""
+    return {"pid": os.getpid(), "fonts": fonts.stats(), "templates": templates.stats()}
+
+
+class RenderPool:
+    """
+    Process pool with admission control, for one event loop.
+
+    At most `workers` jobs run and `queue` more wait for a worker; anything
+    beyond that is refused with RenderBusy right away. The time limit counts
+    from when a job starts running, not from when it was queued.
+    """
+
+    def __init__(
+        self,
+        workers: int = RENDER_WORKERS,
+        queue: int = RENDER_QUEUE,
+        timeout: float = RENDER_TIMEOUT,
+        max_tasks: int = RENDER_MAX_TASKS
+    ):
+        self.workers = max(1, workers)
+        self.limit = self.workers + max(0, queue)
+        self.timeout = timeout
+        self.max_tasks = max_tasks or None
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.pending = 0  # Running plus queued
+        self.done = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: a fork would copy the bot's event loop and locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks
+            )
+        return self._executor
+
+    async def start(self):
+        """Spawn the workers ahead of the first job."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        paths = await asyncio.gather(*(
+            loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)
+        ))
+        logger.info(f"Render pool: {self.workers} workers, font {paths[0]}")
+
+    async def render(self, template_path: Path, text_blocks: list[TextBlock]) -> Path:
+        """generate_meme() in a worker; raises RenderBusy or RenderTimeout."""
+        return await self.run(generate_meme, template_path, text_blocks, MEME_MAX_SIDE or None)
+
+    async def worker_stats(self) -> dict:
+        """
+        Font and template cache counters of one worker (whichever takes the job).
+
+        Not a render: it skips admission control, so it is never refused as
+        busy and doesn't count towards done; it waits at most `timeout`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), _worker_stats)
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def run(self, fn, *args):
+        """fn(*args) in a worker (fn and args must pickle)."""
+        if self.pending >= self.limit:
+            self.rejected += 1
+            raise RenderBusy()
+        self.pending += 1
+        try:
+            async with self._slots:
+                try:
+                    result = await self._submit(fn, args)
+                except BrokenProcessPool:
+                    # A worker died (or was killed for another job's timeout); one retry
+                    result = await self._submit(fn, args)
+            self.done += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    async def _submit(self, fn, args):
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"Render job {fn.__name__} took over {self.timeout}s, restarting the pool")
+            self._restart(executor)
+            raise RenderTimeout() from None
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Kill a pool's workers (a running job can't be cancelled otherwise); the next job starts a new one."""
+        if self._executor is not executor:
+            return  # Already replaced
+        self._executor = None
+        self.restarts += 1
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "limit": self.limit,
+            "done": self.done,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "restarts": self.restarts,
+        }
+
+
+render_pool = RenderPool()
+atexit.register(render_pool.shutdown)
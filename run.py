@@ -16,6 +16,7 @@ from aiogram.types import MenuButtonWebApp, WebAppInfo
 from config import BOT_TOKEN, LOG_LEVEL, WEB_URL
 from database import init_db
 import database_new as db_new
+from render_pool import render_pool
 from handlers import user_router, admin_router
 from middlewares import RateLimitMiddleware, UserTrackingMiddleware, ErrorLoggingMiddleware
 
@@ -56,6 +57,10 @@ async def main():
     await db_new.init_db()
     logger.info("✅ Databases initialized")
     
+    # Meme rendering runs in worker processes, off the shared event loop
+    await render_pool.start()
+    logger.info("✅ Render workers started")
+    
     # Start web server in background thread
     web_thread = threading.Thread(target=run_web_server, daemon=True)
     web_thread.start()
@@ -99,7 +104,11 @@ async def main():
     logger.info("=" * 50)
     
     # Start polling
-    await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+    try:
+        await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+    finally:
+        render_pool.shutdown()
+        await db_new.close_db()
 
 
 if __name__ == "__main__":
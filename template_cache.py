@@ -0,0 +1,95 @@
+"""
+MemeMakerBot - Template Cache
+Decoded RGB templates kept in memory under a byte budget, so popular
+templates are not re-decoded for every meme. One cache per render worker.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from config import TEMPLATE_CACHE_MB
+
+logger = logging.getLogger(__name__)
+
+
+def decode_template(path: Path, max_side: int | None = None) -> Image.Image:
+    """
+    Template as RGB, no larger than max_side on its long side.
+
+    JPEGs are decoded straight at 1/2..1/8 scale when that still covers
+    max_side (draft mode), then resized down the rest of the way.
+    """
+    with Image.open(path) as im:
+        if max_side and max(im.size) > max_side:
+            ratio = max_side / max(im.size)
+            im.draft("RGB", (int(im.width * ratio), int(im.height * ratio)))
+        img = im.convert("RGB")
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+    return img
+
+
+class TemplateCache:
+    """
+    LRU of decoded templates keyed by (path, max_side), valid while the
+    file's mtime is unchanged. get() hands out copies, so callers can draw
+    on them. Thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = TEMPLATE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images: OrderedDict[tuple[str, int | None], tuple[int, Image.Image]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, max_side: int | None = None) -> Image.Image:
+        """A copy of the decoded template, decoding it on a miss."""
+        key = (str(path), max_side)
+        mtime = Path(path).stat().st_mtime_ns
+        with self._lock:
+            entry = self._images.get(key)
+            if entry is not None and entry[0] == mtime:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+        img = decode_template(path, max_side)
+        self._put(key, mtime, img)
+        return img.copy()
+
+    def _put(self, key: tuple, mtime: int, img: Image.Image):
+        size = _image_bytes(img)
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._bytes -= _image_bytes(old[1])
+            if size > self.max_bytes:
+                return  # Would evict everything else; decode it every time instead
+            self._images[key] = (mtime, img)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._images.popitem(last=False)
+                self._bytes -= _image_bytes(evicted)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._images),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def _image_bytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+templates = TemplateCache()
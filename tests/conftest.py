@@ -0,0 +1,5 @@
+"""Tests run against the modules at the repo root."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,70 @@
+"""
+Keyset pagination while counter deltas are still buffered: cursors must hold
+the stored sort values, which is what the page query compares against.
+"""
+import asyncio
+
+import pytest
+
+import counters
+import database_new as db
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = tmp_path / "memeplatform.db"
+    monkeypatch.setattr(db, "DATABASE_PATH", path)
+    # A buffer that never flushes on its own, so deltas stay pending
+    key = str(path.resolve())
+    buffer = counters._buffers[key] = counters.CounterBuffer(
+        path, db.COUNTER_COLUMNS, flush_ms=3_600_000, max_pending=1_000_000
+    )
+    yield buffer
+    buffer.stop()
+    counters._buffers.pop(key, None)
+
+
+async def _walk(sort_by: str, limit: int) -> list[list[int]]:
+    pages, cursor = [], None
+    while len(pages) < 20:  # A repeating cursor would otherwise loop forever
+        page = await db.get_memes_page(sort_by=sort_by, sort_order="DESC", limit=limit, cursor=cursor)
+        pages.append([m["id"] for m in page["memes"]])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return pages
+
+
+@pytest.mark.parametrize("sort_by", ["views_count", "likes_count"])
+def test_pages_with_pending_counters(database, sort_by):
+    async def scenario():
+        await db.init_db()
+        try:
+            user = await db.get_or_create_user(1, "author")
+            ids = [
+                await db.create_meme(author_id=user["id"], filename=f"m{i}.jpg", title=f"m{i}", category_id=1)
+                for i in range(9)
+            ]
+            await db.bulk_approve(ids, user["id"])
+            await db._writer().executemany(
+                f"UPDATE memes SET {sort_by} = ? WHERE id = ?",
+                [(10 * (i + 1), meme_id) for i, meme_id in enumerate(ids)]
+            )
+            stored = await _walk(sort_by, 3)
+
+            # Pending deltas big enough to reorder rows if they were compared
+            for meme_id in ids[::2]:
+                database.add("memes", sort_by, meme_id, 25)
+            pending = await _walk(sort_by, 3)
+
+            first = await db.get_memes_page(sort_by=sort_by, sort_order="DESC", limit=3)
+            return ids, stored, pending, first
+        finally:
+            await db.close_db()
+
+    ids, stored, pending, first = asyncio.run(scenario())
+    walked = [meme_id for page in pending for meme_id in page]
+    assert sorted(walked) == sorted(ids), "pages skipped or repeated rows"
+    assert pending == stored
+    # Displayed counters still include the pending deltas
+    assert all(m[sort_by] % 10 == 5 for m in first["memes"] if m["id"] in ids[::2])
@@ -0,0 +1,36 @@
+"""
+Captions drawn with generator.fit_text must be pixel-identical to the ones
+the old linear search drew (benchmarks/bench_text_fit.py, run here as a check).
+"""
+import random
+
+import pytest
+from PIL import ImageChops
+
+import generator
+from benchmarks.bench_text_fit import FONT_SIZES, SIZES, WORDS, reference_fit, render
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_fit_text_matches_linear_search(monkeypatch, seed):
+    font_path = generator.find_font()
+    if font_path is None:
+        pytest.skip("no TrueType font installed")
+    # render() swaps generator.fit_text; monkeypatch puts the real one back
+    monkeypatch.setattr(generator, "fit_text", generator.fit_text)
+    fit_text = generator.fit_text
+
+    rng = random.Random(seed)
+    cases = [
+        (rng.choice(SIZES), " ".join(rng.choices(WORDS, k=rng.randint(1, 30))),
+         rng.choice(list(generator.POSITIONS)), rng.choice(FONT_SIZES))
+        for _ in range(25)
+    ]
+    expected, _ = render(cases, reference_fit, font_path)
+    actual, _ = render(cases, fit_text, font_path)
+
+    differing = [
+        case for case, a, b in zip(cases, expected, actual)
+        if ImageChops.difference(a, b).getbbox() is not None
+    ]
+    assert not differing, f"{len(differing)}/{len(cases)} captions differ, e.g. {differing[0]}"
@@ -0,0 +1,144 @@
+"""
+MemePlatform - Image Variants
+Downscaled WebP/JPEG copies of uploaded images, rendered in a process pool
+so Pillow never blocks the event loop or the GIL
+"""
+import asyncio
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from config import UPLOADS_DIR, THUMB_WORKERS
+from media import media_url, versioned
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = UPLOADS_DIR / "variants"
+VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Variant name -> max width; "thumb" is for cards and grids, "medium" for the meme page
+VARIANT_WIDTHS = {"thumb": 320, "medium": 1080}
+FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpeg": ("JPEG", {"quality": 85, "optimize": True})}
+EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg"}
+
+# Animated GIFs and videos keep using the original
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def variant_name(filename: str, size: str, fmt: str) -> str:
+    """Path of a variant relative to the uploads dir."""
+    return f"variants/{Path(filename).stem}-{size}{EXTENSIONS[fmt]}"
+
+
+def render_variants(filename: str, uploads_dir: Path = UPLOADS_DIR) -> dict:
+    """
+    Write every variant of one upload; runs inside a pool worker.
+
+    Returns {size: {"width", "height", "webp", "jpeg"}}. The smallest size is
+    always written (never upscaled, so it may be the original's width); larger
+    sizes the original is not wider than are skipped, since the original
+    already serves them. The dict is never empty.
+    """
+    with Image.open(uploads_dir / filename) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+        variants = {}
+        for size, max_width in sorted(VARIANT_WIDTHS.items(), key=lambda item: item[1]):
+            if im.width <= max_width and variants:
+                break
+            scaled = im.copy()
+            scaled.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+            entry = {"width": scaled.width, "height": scaled.height}
+            for fmt, (pil_format, options) in FORMATS.items():
+                out = scaled.convert("RGB") if pil_format == "JPEG" else scaled
+                name = variant_name(filename, size, fmt)
+                out.save(uploads_dir / name, pil_format, **options)
+                entry[fmt] = name
+            variants[size] = entry
+    return variants
+
+
+def render_resized(source: Path, dest: Path, width: int, fmt: str):
+    """Write `source` scaled down to `width` (never up) to `dest`; runs in a pool worker."""
+    pil_format, options = FORMATS[fmt]
+    with Image.open(source) as im:
+        # JPEGs decode at 1/2..1/8 scale when both sides stay >= width (EXIF rotation safe)
+        im.draft("RGB", (width, width))
+        im = ImageOps.exif_transpose(im)
+        alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+        im = im.convert("RGBA" if alpha and pil_format != "JPEG" else "RGB")
+        im.thumbnail((width, width * 4), Image.LANCZOS)
+        temp = dest.with_suffix(".tmp")
+        im.save(temp, pil_format, **options)
+    os.replace(temp, dest)
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for variant rendering (started on first use).
+
+    Workers are spawned, not forked: a fork would copy the running event
+    loop, the DB threads and their locks into every worker.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, THUMB_WORKERS), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+@atexit.register
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def resize_image(source: Path, dest: Path, width: int, fmt: str):
+    """render_resized() in the pool."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(get_pool(), render_resized, source, dest, width, fmt)
+
+
+async def build_variants(filename: str) -> Optional[dict]:
+    """Render variants for an upload in the pool; None when it has none."""
+    if Path(filename).suffix.lower() not in SOURCE_EXTENSIONS:
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(), render_variants, filename)
+    except Exception as e:
+        logger.warning(f"Could not render variants of {filename}: {e}")
+        return None
+
+
+def variant_files(filename: str) -> list[Path]:
+    """Every variant file an upload may have (for deletion)."""
+    return [
+        UPLOADS_DIR / variant_name(filename, size, fmt)
+        for size in VARIANT_WIDTHS for fmt in FORMATS
+    ]
+
+
+def variant_url(meme: dict, size: str = "thumb", fmt: str = "webp") -> str:
+    """URL of the best variant of a meme, falling back to the original."""
+    variants = meme.get("variants")
+    if isinstance(variants, str):
+        variants = json.loads(variants)
+    # A size is missing when the original is no wider, so the original fits
+    if variants and size in variants:
+        return versioned(f"/data/uploads/{variants[size][fmt]}", meme)
+    return media_url(meme)
@@ -0,0 +1,192 @@
+"""
+MemePlatform - Upload Storage
+Uploads are streamed to a temp file in UPLOADS_DIR chunk by chunk (size
+limit and SHA-256 checked on the fly), then renamed into place atomically.
+Resumable uploads grow a partial file in PARTIAL_DIR across requests.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from config import DATA_DIR, UPLOADS_DIR
+
+CHUNK_SIZE = 1024 * 1024
+TEMP_PREFIX = ".upload-"
+PARTIAL_DIR = DATA_DIR / "partial"  # Outside the served dir, same filesystem
+PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+
+_UPLOAD_ID = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+class UploadTooLarge(Exception):
+    """The upload went over its size limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+@dataclass
+class StoredFile:
+    filename: str
+    size: int
+    sha256: str
+
+    @property
+    def path(self) -> Path:
+        return UPLOADS_DIR / self.filename
+
+
+class UploadWriter:
+    """
+    A file being received: bytes go to a hidden temp file next to the
+    destination, so commit() is a same-filesystem rename and a half-written
+    upload is never visible under its final name.
+    """
+
+    def __init__(self, max_size: int, directory: Path = UPLOADS_DIR):
+        self.max_size = max_size
+        self.directory = Path(directory)
+        fd, temp = tempfile.mkstemp(dir=self.directory, prefix=TEMP_PREFIX, suffix=".part")
+        self.temp_path = Path(temp)
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        """Append a chunk; raises UploadTooLarge as soon as the limit is passed."""
+        if self.size + len(chunk) > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def copy_from(self, source: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        """Stream a whole file object in."""
+        while chunk := source.read(chunk_size):
+            self.write(chunk)
+
+    def commit(self, ext: str) -> StoredFile:
+        """Flush, fsync and rename into place under a fresh name."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        filename = f"{uuid.uuid4().hex}{ext}"
+        os.replace(self.temp_path, self.directory / filename)
+        return StoredFile(filename, self.size, self._hash.hexdigest())
+
+    def abort(self):
+        """Drop the partial file."""
+        self._file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+
+def _store(source: BinaryIO, ext: str, max_size: int, directory: Path) -> StoredFile:
+    writer = UploadWriter(max_size, directory)
+    try:
+        writer.copy_from(source)
+        return writer.commit(ext)
+    except BaseException:
+        writer.abort()
+        raise
+
+
+async def save_upload(
+    source: BinaryIO,
+    ext: str,
+    max_size: int,
+    directory: Path = UPLOADS_DIR
+) -> StoredFile:
+    """Copy a file object into the uploads dir on a worker thread."""
+    return await asyncio.to_thread(_store, source, ext, max_size, directory)
+
+
+# ═══════════════════════════════════════════════
+# RESUMABLE UPLOADS
+# ═══════════════════════════════════════════════
+
+def partial_path(upload_id: str) -> Path:
+    """Partial file of a resumable upload."""
+    if not _UPLOAD_ID.fullmatch(upload_id):
+        raise ValueError(f"Bad upload id: {upload_id!r}")
+    return PARTIAL_DIR / f"{upload_id}.part"
+
+
+def partial_size(upload_id: str) -> int:
+    """Bytes received so far, i.e. the offset the next chunk must start at."""
+    try:
+        return partial_path(upload_id).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+async def append_chunks(upload_id: str, chunks: AsyncIterator[bytes], limit: int) -> int:
+    """
+    Append a streamed request body to a partial upload; returns the new size.
+
+    Pieces are gathered into CHUNK_SIZE writes done on a worker thread.
+    Whatever arrived before a disconnect or UploadTooLarge stays on disk,
+    so the client can resume from partial_size().
+    """
+    f = await asyncio.to_thread(open, partial_path(upload_id), "ab")
+    size = f.tell()
+    buffer = bytearray()
+    try:
+        async for chunk in chunks:
+            if size + len(buffer) + len(chunk) > limit:
+                raise UploadTooLarge(limit)
+            buffer += chunk
+            if len(buffer) >= CHUNK_SIZE:
+                await asyncio.to_thread(f.write, buffer)
+                size += len(buffer)
+                buffer = bytearray()
+    finally:
+        if buffer:
+            await asyncio.to_thread(f.write, buffer)
+            size += len(buffer)
+        await asyncio.to_thread(f.close)
+    return size
+
+
+def _finish(upload_id: str, ext: str, directory: Path) -> StoredFile:
+    path = partial_path(upload_id)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+        os.fsync(f.fileno())
+    filename = f"{uuid.uuid4().hex}{ext}"
+    size = path.stat().st_size
+    os.replace(path, Path(directory) / filename)
+    return StoredFile(filename, size, digest.hexdigest())
+
+
+async def finish_partial(upload_id: str, ext: str, directory: Path = UPLOADS_DIR) -> StoredFile:
+    """Hash a complete partial upload and rename it into place."""
+    return await asyncio.to_thread(_finish, upload_id, ext, directory)
+
+
+def discard_partial(upload_id: str):
+    """Drop a partial upload."""
+    partial_path(upload_id).unlink(missing_ok=True)
+
+
+def sweep_partials(max_age: int) -> int:
+    """Remove partial and temp upload files untouched for max_age seconds."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in [*PARTIAL_DIR.glob("*.part"), *UPLOADS_DIR.glob(f"{TEMP_PREFIX}*.part")]:
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
@@ -2,21 +2,38 @@
 MemePlatform - FastAPI Web Application
 Full web interface with API
 """
+import asyncio
+import logging
 import os
-import uuid
+import secrets
 import shutil
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-from fastapi import FastAPI, Request, Form, File, UploadFile, HTTPException, Depends, Query
+from fastapi import FastAPI, Request, Form, File, UploadFile, HTTPException, Depends, Query, BackgroundTasks
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
 import database_new as db
-from config import ADMIN_IDS
+from thumbnails import (
+    build_variants, variant_files, variant_url, resize_image, SOURCE_EXTENSIONS, EXTENSIONS
+)
+from image_cache import get_image_cache
+from media import serve_file, media_url
+from uploads import (
+    save_upload, UploadTooLarge, StoredFile, partial_size, append_chunks,
+    finish_partial, discard_partial, sweep_partials
+)
+from config import (
+    ADMIN_IDS, SWEEP_INTERVAL, HOT_REFRESH_INTERVAL, RELATED_REFRESH_INTERVAL,
+    UPLOAD_CHUNK_SIZE, UPLOAD_SESSION_TTL, IMG_MAX_WIDTH, IMG_WIDTH_STEP
+)
+
+logger = logging.getLogger(__name__)
 
 # Paths
 BASE_DIR = Path(__file__).parent
@@ -31,17 +48,39 @@ TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
 
 # Config
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
+MAX_FORM_OVERHEAD = 1024 * 1024  # Multipart headers and text fields on top of the file
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp4", ".webm"}
+UPLOAD_ROUTES = {"/upload"}
 
 app = FastAPI(title="MemePlatform", version="1.0.0")
 app.add_middleware(SessionMiddleware, secret_key=os.environ.get("SECRET_KEY", "supersecretkey123"))
 
 # Static files
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-app.mount("/data/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 # Templates
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+templates.env.globals["variant_url"] = variant_url
+templates.env.globals["media_url"] = media_url
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Refuse oversized uploads by Content-Length before the body is parsed.
+
+    The multipart form is spooled in full before the handler runs, so a body
+    without Content-Length (chunked) can't be limited and is refused too.
+    """
+    if request.method == "POST" and request.url.path in UPLOAD_ROUTES:
+        length = request.headers.get("content-length")
+        if not length or not length.isdigit():
+            return JSONResponse({"detail": "Нужен заголовок Content-Length"}, status_code=411)
+        if int(length) > MAX_FILE_SIZE + MAX_FORM_OVERHEAD:
+            return JSONResponse(
+                {"detail": "Файл слишком большой (макс. 50 МБ)"}, status_code=413
+            )
+    return await call_next(request)
 
 
 @app.on_event("startup")
@@ -85,6 +124,33 @@ async def require_admin(request: Request) -> dict:
     return user
 
 
+def remove_uploads(filenames: list[str]):
+    """Delete uploaded files and their variants (run as a background task after the response)."""
+    for filename in filenames:
+        get_image_cache().forget(f"{Path(filename).stem}-w")
+        for path in [UPLOAD_DIR / filename, *variant_files(filename)]:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove {path.name}: {e}")
+
+
+def parse_meme_ids(values) -> list[int]:
+    """Validate a list of meme ids from a request body."""
+    try:
+        return [int(value) for value in values or []]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid meme ids")
+
+
+async def mark_liked(user: Optional[dict], memes: list) -> list:
+    """Set meme["user_liked"] for a whole page with one query."""
+    liked = await db.liked_ids(user["id"], [m["id"] for m in memes]) if user else set()
+    for meme in memes:
+        meme["user_liked"] = meme["id"] in liked
+    return memes
+
+
 def get_file_type(filename: str) -> str:
     """Determine file type from extension."""
     ext = Path(filename).suffix.lower()
@@ -99,10 +165,108 @@ def get_file_type(filename: str) -> str:
 # STARTUP
 # ═══════════════════════════════════════════════
 
+async def sweep_expired():
+    """Periodically purge expired sessions, spent admin codes and abandoned uploads."""
+    while True:
+        try:
+            deleted = await db.purge_expired()
+            expired = await db.expire_upload_sessions(UPLOAD_SESSION_TTL)
+            for upload_id in expired:
+                discard_partial(upload_id)
+            deleted["upload_sessions"] = len(expired)
+            deleted["upload_files"] = await asyncio.to_thread(sweep_partials, UPLOAD_SESSION_TTL)
+            if any(deleted.values()):
+                logger.info(f"Purged expired rows: {deleted}")
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
+        await asyncio.sleep(SWEEP_INTERVAL)
+
+
+async def refresh_hot():
+    """Periodically rescore memes whose likes/views/shares changed."""
+    while True:
+        try:
+            rescored = await db.refresh_hot_scores()
+            if rescored:
+                logger.debug(f"Rescored {rescored} memes")
+        except Exception as e:
+            logger.error(f"Hot score refresh failed: {e}")
+        await asyncio.sleep(HOT_REFRESH_INTERVAL)
+
+
+async def refresh_related():
+    """Periodically rebuild related-meme lists of memes with new likes or moderation."""
+    while True:
+        try:
+            rebuilt = await db.refresh_related()
+            if rebuilt:
+                logger.debug(f"Rebuilt related memes for {rebuilt} memes")
+        except Exception as e:
+            logger.error(f"Related memes refresh failed: {e}")
+        await asyncio.sleep(RELATED_REFRESH_INTERVAL)
+
+
 @app.on_event("startup")
 async def startup():
-    """Initialize database on startup."""
+    """Initialize database and start background jobs."""
     await db.init_db()
+    app.state.jobs = [
+        asyncio.create_task(sweep_expired()),
+        asyncio.create_task(refresh_hot()),
+        asyncio.create_task(refresh_related()),
+    ]
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background jobs and close pooled database connections."""
+    for job in getattr(app.state, "jobs", []):
+        job.cancel()
+    await db.close_db()
+
+
+# ═══════════════════════════════════════════════
+# MEDIA
+# ═══════════════════════════════════════════════
+
+@app.api_route("/data/uploads/{path:path}", methods=["GET", "HEAD"])
+async def uploaded_file(request: Request, path: str):
+    """Uploaded files: ETags, 304s, byte ranges; ?v= URLs are immutable."""
+    return await serve_file(request, UPLOAD_DIR, path)
+
+
+# ═══════════════════════════════════════════════
+# RESIZED IMAGES
+# ═══════════════════════════════════════════════
+
+IMAGE_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+@app.get("/img/{meme_id}")
+async def resized_image(meme_id: int, w: int = Query(320, ge=16), fmt: str = "webp"):
+    """Meme image scaled to width w (rounded up to IMG_WIDTH_STEP), served from the disk cache."""
+    if fmt not in IMAGE_TYPES:
+        raise HTTPException(status_code=400, detail="fmt must be webp or jpeg")
+    meme = await db.get_meme_file(meme_id)
+    if not meme:
+        raise HTTPException(status_code=404, detail="Meme not found")
+    if Path(meme["filename"]).suffix.lower() not in SOURCE_EXTENSIONS:
+        # Animations and videos are served as uploaded, from their immutable URL
+        return RedirectResponse(media_url(meme), status_code=302)
+    
+    width = min(-(-w // IMG_WIDTH_STEP) * IMG_WIDTH_STEP, IMG_MAX_WIDTH)
+    source = UPLOAD_DIR / meme["filename"]
+    name = f"{source.stem}-w{width}{EXTENSIONS[fmt]}"
+    try:
+        path = await get_image_cache().get(
+            name, lambda dest: resize_image(source, dest, width, fmt)
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        path, media_type=IMAGE_TYPES[fmt],
+        headers={"Cache-Control": "public, max-age=604800"}
+    )
 
 
 # ═══════════════════════════════════════════════
@@ -120,33 +284,49 @@ async def miniapp(request: Request):
 # ═══════════════════════════════════════════════
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request, category: int = None, search: str = None, page: int = 1, sort: str = "new"):
-    """Home page with meme gallery."""
+async def home(
+    request: Request,
+    category: int = None,
+    search: str = None,
+    page: int = 1,
+    sort: str = None,
+    cursor: str = None
+):
+    """Home page with meme gallery. Pages follow cursors; ?page=N still works."""
     user = await get_current_user(request)
     
     limit = 24
-    offset = (page - 1) * limit
+    offset = 0 if cursor else (max(page, 1) - 1) * limit
+    
+    # Search results default to best match first
+    sort = sort or ("relevance" if search else "new")
     
     # Sort mapping
     sort_map = {
         "new": ("created_at", "DESC"),
         "popular": ("likes_count", "DESC"),
         "views": ("views_count", "DESC"),
+        "hot": ("hot_score", "DESC"),
+        "relevance": ("relevance", "DESC"),
     }
     sort_by, sort_order = sort_map.get(sort, ("created_at", "DESC"))
     
-    memes = await db.get_memes(
-        status="approved",
-        category_id=category,
-        search=search,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        limit=limit,
-        offset=offset
-    )
-    
-    total_count = await db.count_memes(status="approved", category_id=category, search=search)
-    total_pages = (total_count + limit - 1) // limit
+    try:
+        result = await db.get_memes_page(
+            status="approved",
+            category_id=category,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            with_total=bool(search),
+            approximate=True
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    await mark_liked(user, result["memes"])
     
     categories = await db.get_categories()
     stats = await db.get_stats()
@@ -154,13 +334,15 @@ async def home(request: Request, category: int = None, search: str = None, page:
     return templates.TemplateResponse("index.html", {
         "request": request,
         "user": user,
-        "memes": memes,
+        "memes": result["memes"],
         "categories": categories,
         "stats": stats,
         "current_category": category,
         "search_query": search,
-        "page": page,
-        "total_pages": total_pages,
+        "next_cursor": result["next_cursor"],
+        "prev_cursor": result["prev_cursor"],
+        "total_count": result.get("total"),
+        "total_exact": result.get("total_exact", True),
         "sort": sort
     })
 
@@ -184,12 +366,14 @@ async def view_meme(request: Request, meme_id: int):
     user_liked = False
     if user:
         user_liked = await db.has_liked(user["id"], meme_id)
+    meme["user_liked"] = user_liked
     
     return templates.TemplateResponse("meme.html", {
         "request": request,
         "user": user,
         "meme": meme,
-        "user_liked": user_liked
+        "user_liked": user_liked,
+        "related_memes": await db.get_related_memes(meme_id, limit=6)
     })
 
 
@@ -208,9 +392,9 @@ async def view_shared_meme(request: Request, token: str):
 
 
 @app.get("/category/{category_id}", response_class=HTMLResponse)
-async def category_page(request: Request, category_id: int, page: int = 1):
+async def category_page(request: Request, category_id: int, page: int = 1, cursor: str = None):
     """Category page."""
-    return await home(request, category=category_id, page=page)
+    return await home(request, category=category_id, page=page, cursor=cursor)
 
 
 # ═══════════════════════════════════════════════
@@ -317,33 +501,188 @@ async def upload_meme(
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Недопустимый формат файла")
     
-    # Read and check size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Файл слишком большой (макс. 50 МБ)")
-    
-    # Save file
-    filename = f"{uuid.uuid4().hex}{ext}"
-    file_path = UPLOAD_DIR / filename
-    
-    with open(file_path, "wb") as f:
-        f.write(content)
-    
-    # Create meme record
-    file_type = get_file_type(filename)
-    meme_id = await db.create_meme(
-        author_id=author_id,
-        filename=filename,
-        title=title,
-        description=description,
-        category_id=category_id,
-        file_type=file_type,
-        file_size=len(content)
-    )
+    # Stream to disk off the event loop; the size limit is checked per chunk
+    try:
+        stored = await save_upload(file.file, ext, MAX_FILE_SIZE, UPLOAD_DIR)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Файл слишком большой (макс. 50 МБ)")
+    
+    await create_uploaded_meme(stored, author_id, title, description, category_id)
     
     return RedirectResponse(f"/?uploaded=1", status_code=302)
 
 
+async def create_uploaded_meme(
+    stored: StoredFile,
+    author_id: Optional[int],
+    title: str = None,
+    description: str = None,
+    category_id: int = None
+) -> int:
+    """Insert the meme row for a file already in place (removed again on failure)."""
+    try:
+        meme_id = await db.create_meme(
+            author_id=author_id,
+            filename=stored.filename,
+            title=title,
+            description=description,
+            category_id=category_id,
+            file_type=get_file_type(stored.filename),
+            file_size=stored.size,
+            content_hash=stored.sha256
+        )
+    except Exception:
+        remove_uploads([stored.filename])
+        raise
+    schedule_variants(meme_id, stored.filename)
+    return meme_id
+
+
+variant_jobs: set[asyncio.Task] = set()
+
+
+async def make_variants(meme_id: int, filename: str):
+    """Render and record a meme's image variants."""
+    variants = await build_variants(filename)
+    if variants and not await db.set_meme_variants(meme_id, variants):
+        # Deleted while rendering
+        for path in variant_files(filename):
+            path.unlink(missing_ok=True)
+
+
+def schedule_variants(meme_id: int, filename: str):
+    """Render variants in the background; pages show the original until then."""
+    task = asyncio.create_task(make_variants(meme_id, filename))
+    variant_jobs.add(task)
+    task.add_done_callback(variant_jobs.discard)
+
+
+# ═══════════════════════════════════════════════
+# RESUMABLE UPLOADS
+# ═══════════════════════════════════════════════
+# POST /api/uploads starts one, PUT /api/uploads/{id}?offset=N appends the
+# request body, GET reports the offset to resume from, POST .../complete
+# turns it into a meme. Offsets are the size of the partial file on disk.
+
+active_uploads: set[str] = set()
+
+
+@asynccontextmanager
+async def upload_lock(upload_id: str):
+    """One request at a time per upload."""
+    if upload_id in active_uploads:
+        raise HTTPException(status_code=409, detail="Загрузка уже выполняется")
+    active_uploads.add(upload_id)
+    try:
+        yield
+    finally:
+        active_uploads.discard(upload_id)
+
+
+def upload_owner(request: Request) -> str:
+    """Random id of this browser session that its resumable uploads are bound to."""
+    owner = request.session.get("upload_owner")
+    if not owner:
+        owner = secrets.token_urlsafe(16)
+        request.session["upload_owner"] = owner
+    return owner
+
+
+async def get_upload_or_404(request: Request, upload_id: str) -> dict:
+    """The upload, if it was started from this session or by this user."""
+    upload = await db.get_upload_session(upload_id)
+    if upload:
+        owner = request.session.get("upload_owner")
+        if owner and upload["owner"] and secrets.compare_digest(owner, upload["owner"]):
+            return upload
+        if upload["user_id"] is not None:
+            user = await get_current_user(request)
+            if user and user["id"] == upload["user_id"]:
+                return upload
+    # Someone else's upload looks the same as a missing one
+    raise HTTPException(status_code=404, detail="Загрузка не найдена")
+
+
+def offset_conflict(offset: int) -> JSONResponse:
+    return JSONResponse({"detail": "Неверное смещение", "offset": offset}, status_code=409)
+
+
+@app.post("/api/uploads")
+async def api_create_upload(request: Request):
+    """Start a resumable upload: {filename, size, title, description, category_id}."""
+    user = await get_current_user(request)
+    body = await request.json()
+    
+    filename = str(body.get("filename") or "")
+    if Path(filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Недопустимый формат файла")
+    try:
+        size = int(body.get("size"))
+        category_id = int(body["category_id"]) if body.get("category_id") else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Неверные параметры загрузки")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Пустой файл")
+    if size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="Файл слишком большой (макс. 50 МБ)")
+    
+    upload_id = await db.create_upload_session(
+        user["id"] if user else None, upload_owner(request), filename, size,
+        title=body.get("title"), description=body.get("description"), category_id=category_id
+    )
+    return {"upload_id": upload_id, "offset": 0, "size": size, "chunk_size": UPLOAD_CHUNK_SIZE}
+
+
+@app.get("/api/uploads/{upload_id}")
+async def api_upload_status(request: Request, upload_id: str):
+    """Bytes received so far."""
+    upload = await get_upload_or_404(request, upload_id)
+    return {"upload_id": upload_id, "offset": partial_size(upload_id), "size": upload["size"]}
+
+
+@app.put("/api/uploads/{upload_id}")
+async def api_upload_chunk(request: Request, upload_id: str, offset: int):
+    """Append the raw request body at `offset`."""
+    upload = await get_upload_or_404(request, upload_id)
+    async with upload_lock(upload_id):
+        current = partial_size(upload_id)
+        if offset != current:
+            return offset_conflict(current)
+        try:
+            received = await append_chunks(upload_id, request.stream(), upload["size"])
+        except UploadTooLarge:
+            raise HTTPException(status_code=413, detail="Данных больше, чем заявлено")
+    await db.touch_upload_session(upload_id)
+    return {"upload_id": upload_id, "offset": received, "size": upload["size"]}
+
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def api_complete_upload(request: Request, upload_id: str):
+    """Move a fully received upload into place and create the meme."""
+    upload = await get_upload_or_404(request, upload_id)
+    async with upload_lock(upload_id):
+        received = partial_size(upload_id)
+        if received != upload["size"]:
+            return offset_conflict(received)
+        stored = await finish_partial(upload_id, Path(upload["filename"]).suffix.lower(), UPLOAD_DIR)
+        await db.delete_upload_session(upload_id)
+    
+    meme_id = await create_uploaded_meme(
+        stored, upload["user_id"], upload["title"], upload["description"], upload["category_id"]
+    )
+    return {"success": True, "meme_id": meme_id, "status": "pending"}
+
+
+@app.delete("/api/uploads/{upload_id}")
+async def api_cancel_upload(request: Request, upload_id: str):
+    """Abandon a resumable upload."""
+    await get_upload_or_404(request, upload_id)
+    async with upload_lock(upload_id):
+        await db.delete_upload_session(upload_id)
+        discard_partial(upload_id)
+    return {"success": True}
+
+
 @app.get("/my-memes", response_class=HTMLResponse)
 async def my_memes(request: Request, status: str = None):
     """User's memes page."""
@@ -351,13 +690,21 @@ async def my_memes(request: Request, status: str = None):
     if not user:
         return RedirectResponse("/login", status_code=302)
     
-    memes = await db.get_user_memes(user["id"], status=status)
+    memes = await mark_liked(user, await db.get_user_memes(user["id"], status=status))
+    author_stats = await db.get_author_stats(user["id"])
     
     return templates.TemplateResponse("my_memes.html", {
         "request": request,
         "user": user,
         "memes": memes,
-        "filter_status": status
+        "filter_status": status,
+        "status_filter": status,
+        "stats": {
+            "total": author_stats["total_memes"],
+            "pending": author_stats["pending_count"],
+            "approved": author_stats["approved_count"],
+            "rejected": author_stats["rejected_count"]
+        }
     })
 
 
@@ -368,16 +715,19 @@ async def profile_page(request: Request):
     if not user:
         return RedirectResponse("/login", status_code=302)
     
-    user_memes = await db.get_user_memes(user["id"])
-    approved_count = len([m for m in user_memes if m["status"] == "approved"])
-    pending_count = len([m for m in user_memes if m["status"] == "pending"])
+    author_stats = await db.get_author_stats(user["id"])
     
     return templates.TemplateResponse("profile.html", {
         "request": request,
         "user": user,
-        "approved_count": approved_count,
-        "pending_count": pending_count,
-        "total_memes": len(user_memes)
+        "approved_count": author_stats["approved_count"],
+        "pending_count": author_stats["pending_count"],
+        "total_memes": author_stats["total_memes"],
+        "stats": {
+            "memes": author_stats["total_memes"],
+            "likes_received": author_stats["total_likes"],
+            "views": author_stats["total_views"]
+        }
     })
 
 
@@ -406,23 +756,29 @@ async def admin_dashboard(request: Request):
 
 
 @app.get("/admin/moderation", response_class=HTMLResponse)
-async def admin_moderation(request: Request, page: int = 1):
+async def admin_moderation(request: Request, page: int = 1, cursor: str = None):
     """Admin moderation page."""
     user = await get_current_user(request)
     if not user or not user.get("is_admin"):
         return RedirectResponse("/login", status_code=302)
     
     limit = 24
-    offset = (page - 1) * limit
-    pending = await db.get_memes(status="pending", limit=limit, offset=offset)
-    pending_count = await db.count_memes(status="pending")
+    offset = 0 if cursor else (max(page, 1) - 1) * limit
+    try:
+        result = await db.get_memes_page(
+            status="pending", limit=limit, cursor=cursor, offset=offset, with_total=True
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    pending_count = result["total"]
     
     return templates.TemplateResponse("admin/moderation.html", {
         "request": request,
         "user": user,
-        "memes": pending,
+        "memes": result["memes"],
         "pending_count": pending_count,
-        "page": page
+        "next_cursor": result["next_cursor"],
+        "prev_cursor": result["prev_cursor"]
     })
 
 
@@ -432,7 +788,8 @@ async def admin_memes(
     status: str = None,
     category: int = None,
     search: str = None,
-    page: int = 1
+    page: int = 1,
+    cursor: str = None
 ):
     """Admin all memes page."""
     user = await get_current_user(request)
@@ -440,27 +797,32 @@ async def admin_memes(
         return RedirectResponse("/login", status_code=302)
     
     limit = 24
-    offset = (page - 1) * limit
-    
-    memes = await db.get_memes(
-        status=status,
-        category_id=category,
-        search=search,
-        limit=limit,
-        offset=offset
-    )
+    offset = 0 if cursor else (max(page, 1) - 1) * limit
+    
+    try:
+        result = await db.get_memes_page(
+            status=status,
+            category_id=category,
+            search=search,
+            limit=limit,
+            cursor=cursor,
+            offset=offset
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     categories = await db.get_categories()
     
     return templates.TemplateResponse("admin/memes.html", {
         "request": request,
         "user": user,
-        "memes": memes,
+        "memes": result["memes"],
         "categories": categories,
         "filter_status": status,
         "filter_category": category,
         "search_query": search,
-        "page": page
+        "next_cursor": result["next_cursor"],
+        "prev_cursor": result["prev_cursor"]
     })
 
 
@@ -522,18 +884,12 @@ async def api_reject_meme(request: Request, meme_id: int, reason: str = Form(Non
 
 
 @app.delete("/api/meme/{meme_id}")
-async def api_delete_meme(request: Request, meme_id: int):
+async def api_delete_meme(request: Request, meme_id: int, background_tasks: BackgroundTasks):
     """Delete meme."""
     user = await require_admin(request)
-    meme = await db.get_meme_by_id(meme_id)
-    
-    if meme:
-        # Delete file
-        file_path = UPLOAD_DIR / meme["filename"]
-        if file_path.exists():
-            file_path.unlink()
-        
-        await db.delete_meme(meme_id)
+    filename = await db.delete_meme(meme_id)
+    if filename:
+        background_tasks.add_task(remove_uploads, [filename])
     
     return {"success": True}
 
@@ -546,20 +902,22 @@ async def api_view_meme(meme_id: int):
 
 
 @app.post("/api/meme/{meme_id}/like")
-async def api_toggle_like(request: Request, meme_id: int):
-    """Toggle like - works for anonymous users too."""
+async def api_toggle_like(request: Request, meme_id: int, liked: bool = None):
+    """Toggle like - works for anonymous users too. ?liked=true/false sets it instead."""
     user = await get_current_user(request)
     
     if user:
         # Registered user - use database
-        liked = await db.toggle_like(user["id"], meme_id)
-        meme = await db.get_meme_by_id(meme_id)
-        return {"liked": liked, "likes_count": meme["likes_count"]}
+        try:
+            return await db.toggle_like(user["id"], meme_id, liked)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Meme not found")
     else:
         # Anonymous - just increment counter (localStorage handles toggle)
-        await db.increment_meme_likes(meme_id)
-        meme = await db.get_meme_by_id(meme_id)
-        return {"liked": True, "likes_count": meme["likes_count"]}
+        likes_count = await db.increment_meme_likes(meme_id)
+        if likes_count is None:
+            raise HTTPException(status_code=404, detail="Meme not found")
+        return {"liked": True, "likes_count": likes_count}
 
 
 @app.post("/api/meme/{meme_id}/share")
@@ -590,16 +948,12 @@ async def api_admin_reject_meme(request: Request, meme_id: int):
 
 
 @app.delete("/api/admin/meme/{meme_id}")
-async def api_admin_delete_meme(request: Request, meme_id: int):
+async def api_admin_delete_meme(request: Request, meme_id: int, background_tasks: BackgroundTasks):
     """Delete meme (admin API)."""
     user = await require_admin(request)
-    meme = await db.get_meme_by_id(meme_id)
-    
-    if meme:
-        file_path = UPLOAD_DIR / meme["filename"]
-        if file_path.exists():
-            file_path.unlink()
-        await db.delete_meme(meme_id)
+    filename = await db.delete_meme(meme_id)
+    if filename:
+        background_tasks.add_task(remove_uploads, [filename])
     
     return {"success": True}
 
@@ -612,14 +966,19 @@ async def api_admin_delete_category(request: Request, category_id: int):
     return {"success": True}
 
 
+def bulk_response(results: dict[int, str]) -> dict:
+    """Response for bulk operations: per-id outcomes plus how many succeeded."""
+    done = sum(1 for outcome in results.values() if outcome != "not_found")
+    return {"success": True, "count": done, "results": results}
+
+
 @app.post("/api/admin/bulk/approve")
 async def api_admin_bulk_approve(request: Request):
     """Bulk approve memes."""
     user = await require_admin(request)
     body = await request.json()
-    meme_ids = body.get("ids", [])
-    await db.bulk_approve(meme_ids, user["id"])
-    return {"success": True, "count": len(meme_ids)}
+    meme_ids = parse_meme_ids(body.get("ids"))
+    return bulk_response(await db.bulk_approve(meme_ids, user["id"]))
 
 
 @app.post("/api/admin/bulk/reject")
@@ -627,60 +986,48 @@ async def api_admin_bulk_reject(request: Request):
     """Bulk reject memes."""
     user = await require_admin(request)
     body = await request.json()
-    meme_ids = body.get("ids", [])
+    meme_ids = parse_meme_ids(body.get("ids"))
     reason = body.get("reason", "")
-    await db.bulk_reject(meme_ids, user["id"], reason)
-    return {"success": True, "count": len(meme_ids)}
+    return bulk_response(await db.bulk_reject(meme_ids, user["id"], reason))
 
 
 @app.post("/api/admin/bulk/delete")
-async def api_admin_bulk_delete(request: Request):
-    """Bulk delete memes."""
+async def api_admin_bulk_delete(request: Request, background_tasks: BackgroundTasks):
+    """Bulk delete memes; files are removed after the response is sent."""
     user = await require_admin(request)
     body = await request.json()
-    meme_ids = body.get("ids", [])
-    
-    for meme_id in meme_ids:
-        meme = await db.get_meme_by_id(meme_id)
-        if meme:
-            file_path = UPLOAD_DIR / meme["filename"]
-            if file_path.exists():
-                file_path.unlink()
+    meme_ids = parse_meme_ids(body.get("ids"))
     
-    await db.bulk_delete(meme_ids)
-    return {"success": True, "count": len(meme_ids)}
+    results, filenames = await db.bulk_delete(meme_ids)
+    background_tasks.add_task(remove_uploads, filenames)
+    return bulk_response(results)
 
 
 @app.post("/api/bulk/approve")
 async def api_bulk_approve(request: Request, meme_ids: list[int] = Form(...)):
     """Bulk approve memes."""
     user = await require_admin(request)
-    await db.bulk_approve(meme_ids, user["id"])
-    return {"success": True, "count": len(meme_ids)}
+    return bulk_response(await db.bulk_approve(meme_ids, user["id"]))
 
 
 @app.post("/api/bulk/reject")
 async def api_bulk_reject(request: Request, meme_ids: list[int] = Form(...), reason: str = Form(None)):
     """Bulk reject memes."""
     user = await require_admin(request)
-    await db.bulk_reject(meme_ids, user["id"], reason)
-    return {"success": True, "count": len(meme_ids)}
+    return bulk_response(await db.bulk_reject(meme_ids, user["id"], reason))
 
 
 @app.post("/api/bulk/delete")
-async def api_bulk_delete(request: Request, meme_ids: list[int] = Form(...)):
-    """Bulk delete memes."""
+async def api_bulk_delete(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    meme_ids: list[int] = Form(...)
+):
+    """Bulk delete memes; files are removed after the response is sent."""
     user = await require_admin(request)
-    
-    for meme_id in meme_ids:
-        meme = await db.get_meme_by_id(meme_id)
-        if meme:
-            file_path = UPLOAD_DIR / meme["filename"]
-            if file_path.exists():
-                file_path.unlink()
-    
-    await db.bulk_delete(meme_ids)
-    return {"success": True, "count": len(meme_ids)}
+    results, filenames = await db.bulk_delete(meme_ids)
+    background_tasks.add_task(remove_uploads, filenames)
+    return bulk_response(results)
 
 
 @app.get("/api/stats")
@@ -698,29 +1045,65 @@ async def api_admin_pending():
 
 @app.get("/api/memes")
 async def api_get_memes(
+    request: Request,
     status: str = None,
     category: int = None,
     search: str = None,
     sort: str = "created_at",
     order: str = "desc",
     limit: int = 24,
-    offset: int = 0
+    offset: int = 0,
+    cursor: str = None,
+    total: bool = False,
+    include: str = ""
 ):
-    """Public API to get memes."""
+    """
+    Public API to get memes. sort=relevance ranks search results by match quality.
+
+    Pass cursor (empty for the first page) to get {"memes", "next_cursor"};
+    without it the old offset mode returns a plain list. total=1 adds
+    "total" and "total_exact" (large counts are capped and marked inexact).
+    include=liked adds user_liked to every meme for the signed-in viewer.
+    """
     if status != "approved":
         status = "approved"  # Public API only shows approved
+    with_liked = "liked" in include.split(",")
     
-    memes = await db.get_memes(
-        status=status,
-        category_id=category,
-        search=search,
-        sort_by=sort,
-        sort_order=order,
-        limit=min(limit, 100),
-        offset=offset
-    )
+    if cursor is None:
+        memes = await db.get_memes(
+            status=status,
+            category_id=category,
+            search=search,
+            sort_by=sort,
+            sort_order=order,
+            limit=min(limit, 100),
+            offset=offset
+        )
+        if with_liked:
+            await mark_liked(await get_current_user(request), memes)
+        return memes
     
-    return memes
+    try:
+        result = await db.get_memes_page(
+            status=status,
+            category_id=category,
+            search=search,
+            sort_by=sort,
+            sort_order=order,
+            limit=max(1, min(limit, 100)),
+            cursor=cursor,
+            with_total=total,
+            approximate=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if with_liked:
+        await mark_liked(await get_current_user(request), result["memes"])
+    
+    page = {"memes": result["memes"], "next_cursor": result["next_cursor"]}
+    if total:
+        page["total"], page["total_exact"] = result["total"], result["total_exact"]
+    return page
 
 
 @app.get("/api/categories")